@@ -0,0 +1,108 @@
+"""
+固定脚本的 baseline (例如 "rw; rs; bl; rf" 重复 10 次), 用来和 RL 策略对比。
+
+整个脚本在 C++ 中执行 (MigManager.run_script, 期间释放 GIL), 每一步返回 (area, depth, time)。
+也可以用 replay() 重放一条策略轨迹 (动作 id 序列, 与 MigOptEnv 相同)。
+
+用法: python python/baseline.py
+"""
+import os
+import sys
+import csv
+import time
+
+import config as cfg
+from mig_opt_rules import configure_manager
+from dataset_index import list_circuits
+
+build_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../build'))
+if build_path not in sys.path:
+    sys.path.append(build_path)
+
+try:
+    import mig_core
+except ImportError:
+    print("\n[Error] Cannot import mig_core module! Make sure you compiled the C++ project.")
+    sys.exit(1)
+
+# action id -> run_script 中的缩写
+SCRIPT_TOKENS = ["rw", "bl", "rs", "rf"]
+
+SUMMARY_COLUMNS = ["Circuit", "Script",
+                   "Init_Gates", "Final_Gates", "Gate_Imp(%)",
+                   "Init_Depth", "Final_Depth", "Depth_Imp(%)",
+                   "Time(s)", "Steps"]
+
+
+def actions_to_script(actions):
+    """ [0, 2, 1] -> "rw; rs; bl" """
+    return "; ".join(SCRIPT_TOKENS[int(a)] for a in actions)
+
+
+def run_baseline(aig_file, script, repeat=1, patience=0):
+    """ 返回 (mgr, 初始 (area, depth), 每步 (area, depth, time) 数组) """
+    mgr = mig_core.MigManager(aig_file)
+    configure_manager(mgr)
+    init = (mgr.get_node_count(), mgr.get_depth())
+    trace = mgr.run_script(script, repeat=repeat, patience=patience)
+    return mgr, init, trace
+
+
+def replay(aig_file, actions):
+    """ 重放一条策略轨迹 """
+    return run_baseline(aig_file, actions_to_script(actions))
+
+
+def main():
+    files = list_circuits(cfg.TEST_DATA_DIR, include_timeouts=True)
+    if not files:
+        print(f"[Error] No .aig files found in {cfg.TEST_DATA_DIR}")
+        return
+
+    script = cfg.BASELINE_SCRIPT
+    print(f"Found {len(files)} circuits. Baseline: '{script}' x{cfg.BASELINE_REPEAT} "
+          f"(patience {cfg.BASELINE_PATIENCE})\n")
+
+    csv_path = os.path.join(cfg.RESULTS_DIR, "baseline_summary.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+
+        for i, aig_file in enumerate(files):
+            filename = os.path.basename(aig_file)
+            start_time = time.time()
+            try:
+                _, (init_gates, init_depth), trace = run_baseline(
+                    aig_file, script, cfg.BASELINE_REPEAT, cfg.BASELINE_PATIENCE
+                )
+            except Exception as e:
+                print(f"[{i+1}/{len(files)}] [Critical Error] Failed on {aig_file}: {e}")
+                continue
+            elapsed = time.time() - start_time
+
+            final_gates, final_depth = (int(trace[-1, 0]), int(trace[-1, 1])) if len(trace) else (init_gates, init_depth)
+            gate_imp = (init_gates - final_gates) / max(init_gates, 1) * 100
+            depth_imp = (init_depth - final_depth) / max(init_depth, 1) * 100
+
+            writer.writerow({
+                "Circuit": filename,
+                "Script": script,
+                "Init_Gates": init_gates,
+                "Final_Gates": final_gates,
+                "Gate_Imp(%)": round(gate_imp, 2),
+                "Init_Depth": init_depth,
+                "Final_Depth": final_depth,
+                "Depth_Imp(%)": round(depth_imp, 2),
+                "Time(s)": round(elapsed, 2),
+                "Steps": len(trace),
+            })
+            f.flush()
+
+            print(f"[{i+1}/{len(files)}] {filename:<30} | Gates {gate_imp:+.2f}% | Depth {depth_imp:+.2f}% | "
+                  f"{len(trace)} steps | {elapsed:.2f}s")
+
+    print(f"\nBaseline report: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
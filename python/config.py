@@ -38,6 +38,8 @@ MODEL_DIR = os.path.join(PROJECT_ROOT, 'model')
 if not os.path.exists(MODEL_DIR):
     os.makedirs(MODEL_DIR)
 MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
+# export_policy.py 导出的纯 NumPy actor 权重 (fast_infer.py 使用)
+NUMPY_POLICY_PATH = MODEL_PATH + ".npz"
 
 # 日志路径
 LOG_DIR = os.path.join(PROJECT_ROOT, 'mig_opt_logs', CURRENT_MODE)
@@ -47,13 +49,51 @@ RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
 if not os.path.exists(RESULTS_DIR):
     os.makedirs(RESULTS_DIR)
 
+# test.py 断点续跑: 跳过账本中已完成 (输入哈希 + 模型哈希 + 模式一致, 且优化结果存在) 的电路
+TEST_RESUME = True
+
 # 数据集路径
 VERILOG_FILE = os.path.join(PROJECT_ROOT, 'benchmarks/big/mccarthy91.phx.aig')
 DATASET_PATH = os.path.join(PROJECT_ROOT, 'benchmarks/small/*.aig')
 TEST_DATA_DIR = os.path.join(PROJECT_ROOT, 'benchmarks/big/*.aig')
 
+# 数据集索引 (dataset_index.py): 内容哈希 + 电路统计 + 体检状态, 增量更新
+DATASET_INDEX_PATH = os.path.join(PROJECT_ROOT, 'benchmarks/dataset_index.json')
+DATASET_SCREEN_TIMEOUT = 5 # 子进程加载单个电路的超时 (秒)
+TRAIN_EXCLUDE_TIMEOUTS = False # 训练时跳过体检超时的 (超大) 电路
+FILTER_QUARANTINE_TIMEOUTS = True # filter.py 把体检超时的电路也移到隔离区
+
+# 轨迹记录 (离线训练 / 回放), 每个 transition 追加写入列式分块文件
+RECORD_TRAJECTORIES = False
+TRAJECTORY_DIR = os.path.join(PROJECT_ROOT, 'trajectories', CURRENT_MODE)
+
 # ABC 工具路径
 ABC_BINARY_PATH = os.path.join(PROJECT_ROOT, 'lib/abc/abc')
+YOSYS_BINARY_PATH = 'yosys'
+
+# Benchmark 预处理 (preprocess.py): Verilog -> AIGER
+PREPROCESS_INPUT_DIR = os.path.join(PROJECT_ROOT, 'benchmarks/ISCAS89')
+PREPROCESS_OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'benchmarks/ISCAS89_cleaned')
+PREPROCESS_TOOL = "yosys" # 'yosys' 或 'abc'
+PREPROCESS_TIMEOUT = 300 # 单个文件的超时 (秒)
+
+# MigManager 死节点压缩: live/allocated 节点比例低于该阈值时自动 cleanup (<= 0 关闭)
+MIG_COMPACTION_THRESHOLD = 0.7
+
+# 超大电路: refactor / resub 按 PO 分区后多线程并行优化 (门数阈值, 0 表示关闭; rewrite 不分区)
+PARALLEL_GATE_THRESHOLD = 100000
+PARALLEL_THREADS = 0 # 0 = 使用全部硬件线程
+PARALLEL_PARTITIONS = 8 # 确定性模式下的分区数
+PARALLEL_DETERMINISTIC = True # 分区方式与线程数无关, 结果可复现
+
+# 跳过 MigManager.estimate() 预测为无变化的动作 (按 no-op 计算奖励, 不执行综合)
+# 预测基于随机仿真和有限大小的窗口, 可能漏掉一部分 resub / refactor 机会, 所以默认关闭
+SKIP_PREDICTED_NOOPS = False
+
+# baseline.py: 固定脚本 (rw / bl / rs / rf, 用 ';' 分隔), 在 C++ 中整体执行
+BASELINE_SCRIPT = "rw; rs; bl; rf"
+BASELINE_REPEAT = 10
+BASELINE_PATIENCE = 4 # 连续多少步面积和深度都没有刷新最优就停止 (0 = 跑满)
 
 # 训练参数
 NUM_CPU = 8
@@ -0,0 +1,266 @@
+"""
+持久化的数据集索引 (config.DATASET_INDEX_PATH)。
+
+每个 .aig 文件记录: 大小 / mtime / sha256 / PI / PO / 门数 / 深度 / 加载耗时 / 体检状态。
+更新时只重新检查新增或发生变化的文件, 所以 train.py / test.py / filter.py
+启动时不再需要重复扫描和加载整个 benchmark 目录。
+
+体检状态:
+  ok        - 加载成功
+  bad       - 文件本身有问题 (不是 AIGER / 解析失败 / 加载崩溃), 缓存到内容变化为止
+  timeout   - 加载超过 DATASET_SCREEN_TIMEOUT, 连同当时的超时值一起缓存, 超时值变化后重新体检;
+              list_circuits(include_timeouts=True) 仍然返回
+  unchecked - 未体检或环境问题 (例如 mig_core 无法导入), 下次重新体检
+ok / bad / timeout 结果绑定到 mig_core 的构建 (build_id), 重新编译后会重新体检。
+
+    index = update_index(cfg.DATASET_PATH)
+    circuits = list_circuits(cfg.DATASET_PATH, exclude=("new", "_opt"))
+"""
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import config as cfg
+
+INDEX_VERSION = 2
+
+BUILD_DIR = os.path.join(cfg.PROJECT_ROOT, 'build')
+
+# 在子进程中加载电路, C++ 崩溃 (segfault) 不会拖垮主进程
+SCREEN_WORKER = """
+import sys
+import json
+import time
+sys.path.append(sys.argv[1])
+try:
+    import mig_core
+except ImportError:
+    print("[Child] Error: Could not import mig_core")
+    sys.exit(3) # 环境问题, 不是文件的问题
+
+try:
+    start = time.perf_counter()
+    mgr = mig_core.MigManager(sys.argv[2])
+    load_time = time.perf_counter() - start
+    n = mgr.get_node_count()
+    if n == 0: sys.exit(2) # 空电路也不行
+    print(json.dumps({"num_gates": n, "depth": mgr.get_depth(), "load_time": load_time}))
+except Exception as e:
+    print(f"[Child] Exception: {e}")
+    sys.exit(1)
+
+sys.exit(0)
+"""
+
+EXIT_IMPORT_ERROR = 3
+
+# 只有这些状态会被缓存, 其它状态下次更新时重新体检
+CACHED_STATUSES = ("ok", "bad", "timeout")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_aiger_header(path):
+    """ 'aig M I L O A' (二进制) 或 'aag M I L O A' (ASCII) """
+    with open(path, "rb") as f:
+        fields = f.readline().split()
+    if len(fields) < 6 or fields[0] not in (b"aig", b"aag"):
+        raise ValueError(f"Not an AIGER file: {path}")
+    m, i, l, o, a = (int(x) for x in fields[1:6])
+    return {"num_pis": i, "num_latches": l, "num_pos": o, "num_ands": a}
+
+
+def build_id():
+    """ 当前 mig_core 构建的标识, 没有编译产物时返回 None """
+    builds = sorted(glob.glob(os.path.join(BUILD_DIR, "mig_core*.so")) + glob.glob(os.path.join(BUILD_DIR, "mig_core*.pyd")))
+    if not builds:
+        return None
+    return file_sha256(builds[0])[:16]
+
+
+def screen_file(file_path, timeout=None):
+    """
+    启动一个子进程来加载文件。
+    返回: (状态, 统计信息 / 错误信息), 状态为 'ok' / 'bad' / 'timeout' / 'unchecked'
+    """
+    timeout = timeout or cfg.DATASET_SCREEN_TIMEOUT
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", SCREEN_WORKER, BUILD_DIR, file_path],
+            capture_output=True, # 捕获输出，防止刷屏
+            text=True,
+            timeout=timeout # 设置超时，防止死锁（例如读取超大文件卡死）
+        )
+        if result.returncode == 0:
+            return "ok", json.loads(result.stdout.strip().splitlines()[-1])
+        if result.returncode == EXIT_IMPORT_ERROR:
+            return "unchecked", "Could not import mig_core"
+        # 返回码 -11 通常是 Segmentation Fault
+        return "bad", f"Process died with code {result.returncode}. Stderr: {result.stderr.strip()}"
+    except subprocess.TimeoutExpired:
+        # 可能只是机器负载高, 不当作坏文件
+        return "timeout", f"Timeout (Loading took longer than {timeout}s)"
+    except Exception as e:
+        return "unchecked", str(e)
+
+
+def index_key(path):
+    """ 索引中使用相对项目根目录的路径, 方便整个仓库搬家 """
+    return os.path.relpath(os.path.abspath(path), cfg.PROJECT_ROOT)
+
+
+def load_index(index_path=None):
+    index_path = index_path or cfg.DATASET_INDEX_PATH
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {"version": INDEX_VERSION, "files": {}}
+
+
+def save_index(index, index_path=None):
+    index_path = index_path or cfg.DATASET_INDEX_PATH
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def get_entry(index, path):
+    return index["files"].get(index_key(path))
+
+
+def _is_current(entry, screen, build):
+    """ 索引项是否可以直接沿用 (不需要重新体检) """
+    if not screen:
+        return True
+    if entry["status"] not in CACHED_STATUSES or entry.get("build") != build:
+        return False
+    # 超时结果只对当时的超时值有效
+    return entry["status"] != "timeout" or entry.get("screen_timeout") == cfg.DATASET_SCREEN_TIMEOUT
+
+
+def _examine(path, old_entry, screen, build):
+    """ 重新计算一个新增 / 变化文件的索引项 """
+    st = os.stat(path)
+    sha = file_sha256(path)
+
+    # 只有 mtime 变了, 内容没变: 沿用旧的统计信息
+    if old_entry is not None and old_entry.get("sha256") == sha and _is_current(old_entry, screen, build):
+        entry = dict(old_entry)
+        entry["size"] = st.st_size
+        entry["mtime_ns"] = st.st_mtime_ns
+        return entry
+
+    entry = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha,
+        "num_pis": None,
+        "num_pos": None,
+        "num_gates": None,
+        "depth": None,
+        "load_time": None,
+        "status": "unchecked",
+        "reason": None,
+        "build": build,
+        "screen_timeout": cfg.DATASET_SCREEN_TIMEOUT,
+        "checked_at": time.time(),
+    }
+
+    try:
+        header = read_aiger_header(path)
+        entry["num_pis"] = header["num_pis"]
+        entry["num_pos"] = header["num_pos"]
+    except (OSError, ValueError) as e:
+        entry["status"] = "bad"
+        entry["reason"] = str(e)
+        return entry
+
+    if screen:
+        status, info = screen_file(path)
+        entry["status"] = status
+        if status == "ok":
+            entry.update(info)
+        else:
+            entry["reason"] = info
+    return entry
+
+
+def update_index(pattern, exclude=(), index_path=None, screen=True, workers=None, verbose=True):
+    """ 增量更新: 只检查 pattern 下新增或 (size, mtime) 变化的文件, 以及没有有效体检结果的文件 """
+    index = load_index(index_path)
+    files = index["files"]
+    build = build_id() if screen else None
+
+    paths = [p for p in sorted(glob.glob(pattern))
+             if not any(token in os.path.basename(p) for token in exclude)]
+    scanned_keys = set()
+    todo = []
+    for path in paths:
+        key = index_key(path)
+        scanned_keys.add(key)
+        st = os.stat(path)
+        entry = files.get(key)
+        if (entry is not None and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                and _is_current(entry, screen, build)):
+            continue
+        todo.append((key, path, entry))
+
+    # 删除已经不存在的文件 (只处理本次 pattern 覆盖的目录)
+    pattern_dir = index_key(os.path.dirname(pattern))
+    for key in list(files):
+        if os.path.dirname(key) == pattern_dir and key not in scanned_keys:
+            del files[key]
+
+    if todo:
+        if verbose:
+            print(f"[Index] Examining {len(todo)} new/changed files ({len(paths) - len(todo)} cached)...")
+        workers = workers or cfg.NUM_CPU
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries = pool.map(lambda t: _examine(t[1], t[2], screen, build), todo)
+            for (key, _, _), entry in zip(todo, entries):
+                files[key] = entry
+
+        if verbose:
+            unchecked = sum(1 for key, _, _ in todo if files[key]["status"] == "unchecked")
+            timeouts = sum(1 for key, _, _ in todo if files[key]["status"] == "timeout")
+            if unchecked:
+                print(f"[Index] Warning: {unchecked} files could not be screened (is build/ up to date?)")
+            if timeouts:
+                print(f"[Index] Warning: {timeouts} files took longer than {cfg.DATASET_SCREEN_TIMEOUT}s to load")
+
+    save_index(index, index_path)
+    return index
+
+
+def list_circuits(pattern, exclude=("_opt",), index_path=None, screen=True, include_timeouts=False):
+    """ 返回 pattern 下体检通过的电路 (绝对路径); include_timeouts 时也返回加载超时的电路 """
+    index = update_index(pattern, exclude=exclude, index_path=index_path, screen=screen)
+    circuits = []
+    for path in sorted(glob.glob(pattern)):
+        if any(token in os.path.basename(path) for token in exclude):
+            continue
+        entry = get_entry(index, path)
+        if entry is None or entry["status"] == "bad":
+            continue
+        if entry["status"] == "timeout" and not include_timeouts:
+            continue
+        circuits.append(os.path.abspath(path))
+    return circuits
@@ -0,0 +1,61 @@
+"""
+把 PPO 模型的 actor 部分 (mlp_extractor.policy_net + action_net) 导出为 .npz,
+供 fast_infer.py 在不导入 torch / stable_baselines3 的情况下推理。
+
+用法: python python/export_policy.py   (导出 config.CURRENT_MODE 对应的模型)
+"""
+import os
+import numpy as np
+from stable_baselines3 import PPO
+
+import config as cfg
+
+
+# stable_baselines3 的激活函数类名 -> fast_infer.py 中的名字
+ACTIVATIONS = {
+    "Tanh": "tanh",
+    "ReLU": "relu",
+}
+
+
+def export_policy(model_path, out_path):
+    model = PPO.load(model_path, device="cpu")
+    policy = model.policy
+
+    act_name = policy.activation_fn.__name__
+    if act_name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for NumPy export: {act_name}")
+
+    state = {k: v.detach().cpu().numpy() for k, v in policy.state_dict().items()}
+
+    # policy_net 是 [Linear, Act, Linear, Act, ...]，只取 Linear 层
+    arrays = {}
+    layer = 0
+    idx = 0
+    while f"mlp_extractor.policy_net.{idx}.weight" in state:
+        arrays[f"w{layer}"] = state[f"mlp_extractor.policy_net.{idx}.weight"].astype(np.float32)
+        arrays[f"b{layer}"] = state[f"mlp_extractor.policy_net.{idx}.bias"].astype(np.float32)
+        layer += 1
+        idx += 2
+
+    arrays["w_out"] = state["action_net.weight"].astype(np.float32)
+    arrays["b_out"] = state["action_net.bias"].astype(np.float32)
+    arrays["num_layers"] = np.array(layer, dtype=np.int32)
+    arrays["activation"] = np.array(ACTIVATIONS[act_name])
+
+    np.savez(out_path, **arrays)
+    return out_path
+
+
+def main():
+    if not os.path.exists(cfg.MODEL_PATH + ".zip"):
+        print(f"[Error] Model file not found: {cfg.MODEL_PATH}.zip")
+        return
+
+    out_path = export_policy(cfg.MODEL_PATH, cfg.NUMPY_POLICY_PATH)
+    size_kb = os.path.getsize(out_path) / 1024.0
+    print(f"Exported actor of {cfg.MODEL_PATH}.zip -> {out_path} ({size_kb:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+轻量推理: 只依赖 NumPy + mig_core, 不导入 torch / stable_baselines3 / pandas。
+
+先运行 export_policy.py 导出 <MODEL_PATH>.npz, 再运行:
+    python python/fast_infer.py
+行为与 test.py 中的 deterministic 推理一致 (argmax logits), 但不做 CEC 和日志。
+"""
+import os
+import sys
+import time
+import numpy as np
+
+import config as cfg
+from mig_opt_rules import ACTION_NAMES, compute_state_vector, is_success, is_bloated, configure_manager
+from dataset_index import list_circuits
+
+build_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../build'))
+if build_path not in sys.path:
+    sys.path.append(build_path)
+
+try:
+    import mig_core
+except ImportError as e:
+    print(f"\n[Error] Cannot import mig_core module! Make sure you compiled the C++ project.")
+    sys.exit(1)
+
+MAX_STEPS = 40
+
+
+class NumpyPolicy:
+    """ export_policy.py 导出的 actor MLP """
+
+    def __init__(self, npz_path):
+        data = np.load(npz_path)
+        num_layers = int(data["num_layers"])
+        self.layers = [(data[f"w{i}"], data[f"b{i}"]) for i in range(num_layers)]
+        self.w_out = data["w_out"]
+        self.b_out = data["b_out"]
+
+        activation = str(data["activation"])
+        if activation == "tanh":
+            self.act = np.tanh
+        elif activation == "relu":
+            self.act = lambda x: np.maximum(x, 0.0)
+        else:
+            raise ValueError(f"Unknown activation: {activation}")
+
+    def predict(self, obs):
+        x = np.asarray(obs, dtype=np.float32)
+        for w, b in self.layers:
+            x = self.act(x @ w.T + b)
+        logits = x @ self.w_out.T + self.b_out
+        return int(np.argmax(logits))
+
+
+def optimize_circuit(policy, aig_file, mode=cfg.CURRENT_MODE, max_steps=MAX_STEPS):
+    """ 复刻 MigOptEnv 的终止条件，返回 (mgr, 动作序列, 初始指标, 最终指标) """
+    mgr = mig_core.MigManager(aig_file)
+    configure_manager(mgr)
+
+    init_area = float(mgr.get_node_count()) or 1.0
+    init_depth = float(mgr.get_depth()) or 1.0
+    cur_area, cur_depth = init_area, init_depth
+
+    last_action = -1
+    repeat_count = 0
+    actions = []
+
+    for step in range(max_steps):
+        obs = compute_state_vector(cur_area, cur_depth, init_area, init_depth,
+                                   step, max_steps, repeat_count, last_action)
+        action = policy.predict(obs)
+
+        prev_area, prev_depth = cur_area, cur_depth
+        if action == 0: mgr.rewrite()
+        elif action == 1: mgr.balance()
+        elif action == 2: mgr.resub()
+        elif action == 3: mgr.refactor()
+        actions.append(action)
+
+        cur_area = float(mgr.get_node_count())
+        cur_depth = float(mgr.get_depth())
+
+        is_no_op = (prev_area == cur_area and prev_depth == cur_depth)
+        if action == last_action:
+            repeat_count += 1
+        else:
+            repeat_count = 0
+        last_action = action
+
+        if is_success(mode, cur_area, cur_depth, init_area, init_depth):
+            break
+        if is_bloated(mode, cur_area, init_area):
+            break
+        if repeat_count > 8 and is_no_op:
+            break
+
+    return mgr, actions, (init_area, init_depth), (cur_area, cur_depth)
+
+
+def main():
+    if not os.path.exists(cfg.NUMPY_POLICY_PATH):
+        print(f"[Error] NumPy policy not found: {cfg.NUMPY_POLICY_PATH}")
+        print("Please run 'python python/export_policy.py' first.")
+        return
+
+    policy = NumpyPolicy(cfg.NUMPY_POLICY_PATH)
+
+    files = list_circuits(cfg.TEST_DATA_DIR, include_timeouts=True)
+    if not files:
+        print(f"[Error] No .aig files found in {cfg.TEST_DATA_DIR}")
+        return
+
+    print(f"Found {len(files)} circuits. Mode: {cfg.CURRENT_MODE.upper()} (NumPy policy)")
+    for i, aig_file in enumerate(files):
+        filename = os.path.basename(aig_file)
+        start_time = time.time()
+        try:
+            mgr, actions, (init_area, init_depth), (area, depth) = optimize_circuit(policy, aig_file)
+        except Exception as e:
+            print(f"[{i+1}/{len(files)}] [Critical Error] Failed on {aig_file}: {e}")
+            continue
+
+        save_path = os.path.join(cfg.RESULTS_DIR, filename.replace(".aig", f"_opt_{cfg.CURRENT_MODE}.aig"))
+        mgr.save(save_path)
+        elapsed = time.time() - start_time
+
+        gate_imp = (init_area - area) / init_area * 100
+        depth_imp = (init_depth - depth) / init_depth * 100
+        trace = ",".join(ACTION_NAMES[a] for a in actions)
+        print(f"[{i+1}/{len(files)}] {filename:<30} | Gates {gate_imp:+.2f}% | Depth {depth_imp:+.2f}% | "
+              f"{len(actions)} steps | {elapsed:.2f}s")
+        print(f"   -> {trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ from gymnasium import spaces
 import numpy as np
 import sys
 import os
+import time
+from mig_opt_rules import (ACTION_NAMES, MODES, compute_state_vector, improvement_reward,
+                           is_success, is_bloated, configure_manager)
+import config as cfg
 
 build_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../build'))
 if build_path not in sys.path:
@@ -15,13 +19,13 @@ except ImportError as e:
     sys.exit(1)
 
 class MigOptEnv(gym.Env):
-    def __init__(self, aig_files_list, target_mode='depth'):
+    def __init__(self, aig_files_list, target_mode='depth', recorder=None):
         super(MigOptEnv, self).__init__()
         
         self.target_mode = target_mode.lower()
-        valid_modes = ['depth', 'area', 'balanced']
-        if self.target_mode not in valid_modes:
-            raise ValueError(f"Invalid target_mode: {self.target_mode}. Must be one of {valid_modes}")
+        if self.target_mode not in MODES:
+            raise ValueError(f"Invalid target_mode: {self.target_mode}. Must be one of {MODES}")
+        self.mode_idx = MODES.index(self.target_mode)
         
         print(f"[Env] Initialized with Optimization Mode: {self.target_mode.upper()}")
 
@@ -38,6 +42,7 @@ class MigOptEnv(gym.Env):
         except Exception as e:
             print(f"C++ Init Failed: {e}")
             sys.exit(1)
+        configure_manager(self.mig_manager)
 
         self.update_initial_stats()
         
@@ -54,6 +59,12 @@ class MigOptEnv(gym.Env):
         self.max_steps = 40 
         self.repeat_count = 0 
 
+        # optional trajectory.TrajectoryRecorder, keeps every transition on disk
+        self.recorder = recorder
+        self.last_obs = None
+        # MigManager.estimate_all() of the current network, shared by action_masks() and step()
+        self._estimates = None
+
     def update_initial_stats(self):
         self.initial_area = float(self.mig_manager.get_node_count())
         self.initial_depth = float(self.mig_manager.get_depth())
@@ -70,6 +81,7 @@ class MigOptEnv(gym.Env):
         for _ in range(10):
             try:
                 self.current_aig_path = np.random.choice(self.aig_files)
+                self._estimates = None
                 self.mig_manager.reset(self.current_aig_path)
                 if self.mig_manager.get_node_count() > 0:
                     break
@@ -81,7 +93,9 @@ class MigOptEnv(gym.Env):
         self.steps = 0
         self.repeat_count = 0
 
-        return self._get_obs()
+        obs, info = self._get_obs()
+        self.last_obs = obs
+        return obs, info
 
     def _get_obs(self):
         cur_area = float(self.mig_manager.get_node_count())
@@ -94,161 +108,115 @@ class MigOptEnv(gym.Env):
         }
 
     def _compute_state_vector(self, cur_area, cur_depth):
-        # normalize
-        norm_area = cur_area / self.initial_area
-        norm_depth = cur_depth / self.initial_depth
-        
-        # 2. 相对密度
-        init_density = self.initial_area / (self.initial_depth + 1e-5)
-        cur_density = cur_area / (cur_depth + 1e-5)
-        rel_density = cur_density / (init_density + 1e-5)
-
-        progress = self.steps / float(self.max_steps)
-
-        repeat_penalty_feature = min(self.repeat_count / 5.0, 1.0)
-        
-        is_bloated = 1.0 if cur_area > self.initial_area else 0.0
-
-        # 6. 动作历史 (One-Hot)
-        action_one_hot = np.zeros(5, dtype=np.float32)
-        if self.last_action == -1:
-            action_one_hot[0] = 1.0
-        else:
-            action_one_hot[self.last_action + 1] = 1.0
-
-        """
-        Observation Space Description (Shape: 11,)
-        -------------------------------------------------------
-        [0] norm_area      : Float, Cur_Area / Init_Area. (<1.0 is better)
-        [1] norm_depth     : Float, Cur_Depth / Init_Depth. (<1.0 is better)
-        [2] rel_density    : Float, Relative circuit density (Area/Depth ratio).
-        [3] progress       : Float, Step / Max_Steps (0.0 -> 1.0).
-        [4] repeat_penalty : Float, Penalty intensity for repeating actions.
-        [5] is_bloated     : Float, 1.0 if Cur_Area > Init_Area, else 0.0.
-        
-        [6-10] Action History (One-Hot Encoding):
-            [6] : Start / None
-            [7] : Rewrite
-            [8] : Balance
-            [9] : Resub
-            [10]: Refactor
-        -------------------------------------------------------
-        """
-        state = np.array([
-            norm_area, norm_depth, rel_density, progress, 
-            repeat_penalty_feature, is_bloated
-        ], dtype=np.float32)
-        
-        return np.concatenate((state, action_one_hot))
+        return compute_state_vector(
+            cur_area, cur_depth, self.initial_area, self.initial_depth,
+            self.steps, self.max_steps, self.repeat_count, self.last_action
+        )
 
     def step(self, action):
         self.steps += 1
         
         prev_area = float(self.mig_manager.get_node_count())
         prev_depth = float(self.mig_manager.get_depth())
-        prev_adp = prev_area * prev_depth
 
-        if action == 0: self.mig_manager.rewrite()
+        # actions the C++ dry run predicts to change nothing are not executed at all
+        skipped = cfg.SKIP_PREDICTED_NOOPS and self.predicted_effects()[int(action)] == (0, 0)
+
+        action_start = time.perf_counter()
+        if skipped: pass
+        elif action == 0: self.mig_manager.rewrite()
         elif action == 1: self.mig_manager.balance()
         elif action == 2: self.mig_manager.resub()
         elif action == 3: self.mig_manager.refactor()
+        action_latency = time.perf_counter() - action_start
+        if not skipped: self._estimates = None
 
         cur_area = float(self.mig_manager.get_node_count())
         cur_depth = float(self.mig_manager.get_depth())
-        cur_adp = cur_area * cur_depth
-        
-        # compute reward
-        reward = 0.0
         
-        if prev_area != 0:
-            area_imp = (prev_area - cur_area) / prev_area
-        if prev_depth != 0:
-            depth_imp = (prev_depth - cur_depth) / prev_depth
-        if prev_adp != 0:
-            adp_imp = (prev_adp - cur_adp) / prev_adp
-
-        if self.target_mode == 'depth':
-            score = (0.3 * area_imp) + (0.7 * depth_imp)
-
-            if score > 0: reward += score * 60.0
-            else: reward += score * 30.0
-            
-            if cur_area > prev_area and prev_area != 0: reward -= 20.0 * (cur_area / prev_area)
-            if cur_depth > prev_depth and prev_depth != 0: reward -= 30.0 * (cur_depth / prev_depth)
-
-        elif self.target_mode == 'area':
-            score = (0.7 * area_imp) + (0.3 * depth_imp)
-
-            if score > 0: reward += score * 60.0
-            else: reward += score * 30.0
-            
-            if cur_area > prev_area and prev_area != 0: reward -= 30.0 * (cur_area / prev_area)
-            if cur_depth > prev_depth and prev_depth != 0: reward -= 20.0 * (cur_depth / prev_depth)
-
-        elif self.target_mode == 'balanced':
-            score = (0.5 * area_imp) + (0.5 * depth_imp)
-            
-            if score > 0: reward += score * 60.0
-            else: reward += score * 30.0
-            
-            if cur_area > prev_area and prev_area != 0: reward -= 20.0 * (cur_area / prev_area)
-            if cur_depth > prev_depth and prev_depth != 0: reward -= 20.0 * (cur_depth / prev_depth)
-
-        # restriction and penalty
+        # compute reward for every mode from the same transition
+        rewards = np.array([
+            improvement_reward(mode, prev_area, prev_depth, cur_area, cur_depth) for mode in MODES
+        ], dtype=np.float64)
+
+        # restriction and penalty (shared by all modes)
         
         # no operation
         is_no_op = (prev_area == cur_area and prev_depth == cur_depth)
         if is_no_op:
-            reward -= 2.0
+            rewards -= 2.0
 
         # repeat
         if action == self.last_action:
             self.repeat_count += 1
             if is_no_op:
-                reward -= 1.0 * (self.repeat_count ** 2)
+                rewards -= 1.0 * (self.repeat_count ** 2)
             elif self.repeat_count > 5:
-                reward -= 0.5 * self.repeat_count
+                rewards -= 0.5 * self.repeat_count
         else:
             self.repeat_count = 0
 
-        terminated = False
-        truncated = False
-
-        success = False
-        if self.target_mode == 'depth':
-            if cur_area < self.initial_area * 1.1 and cur_depth < self.initial_depth * 0.75:
-                success = True
-        elif self.target_mode == 'area':
-            if cur_area < self.initial_area * 0.8 and cur_depth <= self.initial_depth * 1.1:
-                success = True
-        elif self.target_mode == 'balanced':
-            if cur_area < self.initial_area * 0.9 and cur_depth < self.initial_depth * 0.85:
-                success = True
-
-        if success:
-            reward += 100.0
-            terminated = True
+        success_vec = np.array([
+            is_success(mode, cur_area, cur_depth, self.initial_area, self.initial_depth) for mode in MODES
+        ])
+        rewards[success_vec] += 100.0
+        terminated_vec = success_vec.copy()
 
         # truncated if too large
-        bloat_limit = 3.0 if self.target_mode == 'depth' else 1.5
-        if cur_area > self.initial_area * bloat_limit:
-            reward -= 100.0
-            truncated = True
+        bloated_vec = np.array([is_bloated(mode, cur_area, self.initial_area) for mode in MODES])
+        rewards[bloated_vec] -= 100.0
+        truncated_vec = bloated_vec.copy()
 
         # truncated if take the same action while no improvment
         if self.repeat_count > 8 and is_no_op:
-            truncated = True
-            reward -= 20.0
+            truncated_vec[:] = True
+            rewards -= 20.0
+
+        # the episode itself follows target_mode
+        reward = float(rewards[self.mode_idx])
+        terminated = bool(terminated_vec[self.mode_idx])
+        truncated = bool(truncated_vec[self.mode_idx])
 
         self.last_action = action
         state = self._compute_state_vector(cur_area, cur_depth)
+
+        if self.recorder is not None:
+            self.recorder.record(
+                self.current_aig_path, self.steps, self.last_obs, action, reward,
+                cur_area, cur_depth, self.mig_manager.get_switching_activity(),
+                action_latency, done=(terminated or truncated)
+            )
+        self.last_obs = state
         
         info = {
             "raw_area": cur_area,
             "raw_depth": cur_depth,
-            "action_name": ["Rewrite", "Balance", "Resub", "Refactor"][action],
+            "action_name": ACTION_NAMES[action],
             "is_success": terminated,
-            "mode": self.target_mode
+            "mode": self.target_mode,
+            "skipped": skipped,
+            # per-mode results in MODES order, for training several policies from one rollout
+            "reward_vec": rewards.astype(np.float32),
+            "terminated_vec": terminated_vec,
+            "truncated_vec": truncated_vec,
+            "success_vec": success_vec
         }
         
-        return state, reward, terminated, truncated, info
\ No newline at end of file
+        return state, reward, terminated, truncated, info
+
+    def predicted_effects(self):
+        """ (area delta, depth delta) per action for the current network, computed once per state """
+        if self._estimates is None:
+            self._estimates = [tuple(e) for e in self.mig_manager.estimate_all()]
+        return self._estimates
+
+    def action_masks(self):
+        """ False for actions predicted to be a no-op (sb3-contrib MaskablePPO convention) """
+        masks = np.array([e != (0, 0) for e in self.predicted_effects()])
+        if not masks.any():
+            masks[:] = True
+        return masks
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,114 @@
+import numpy as np
+import config as cfg
+
+# Shared by MigOptEnv and the torch/gym-free runners (fast_infer.py).
+# Only depends on numpy (and config.py) so it stays cheap to import.
+
+ACTION_NAMES = ["Rewrite", "Balance", "Resub", "Refactor"]
+
+# order of the per-mode vectors (reward_vec, terminated_vec, ...) returned by MigOptEnv
+MODES = ["depth", "area", "balanced"]
+
+# mode -> (area weight, depth weight, area growth penalty, depth growth penalty)
+REWARD_WEIGHTS = {
+    "depth": (0.3, 0.7, 20.0, 30.0),
+    "area": (0.7, 0.3, 30.0, 20.0),
+    "balanced": (0.5, 0.5, 20.0, 20.0),
+}
+
+# episode is truncated once the area grows past initial_area * limit
+BLOAT_LIMITS = {
+    "depth": 3.0,
+    "area": 1.5,
+    "balanced": 1.5,
+}
+
+
+def compute_state_vector(cur_area, cur_depth, initial_area, initial_depth,
+                         steps, max_steps, repeat_count, last_action):
+    # normalize
+    norm_area = cur_area / initial_area
+    norm_depth = cur_depth / initial_depth
+
+    # 2. 相对密度
+    init_density = initial_area / (initial_depth + 1e-5)
+    cur_density = cur_area / (cur_depth + 1e-5)
+    rel_density = cur_density / (init_density + 1e-5)
+
+    progress = steps / float(max_steps)
+
+    repeat_penalty_feature = min(repeat_count / 5.0, 1.0)
+
+    is_bloated = 1.0 if cur_area > initial_area else 0.0
+
+    # 6. 动作历史 (One-Hot)
+    action_one_hot = np.zeros(5, dtype=np.float32)
+    if last_action == -1:
+        action_one_hot[0] = 1.0
+    else:
+        action_one_hot[last_action + 1] = 1.0
+
+    """
+    Observation Space Description (Shape: 11,)
+    -------------------------------------------------------
+    [0] norm_area      : Float, Cur_Area / Init_Area. (<1.0 is better)
+    [1] norm_depth     : Float, Cur_Depth / Init_Depth. (<1.0 is better)
+    [2] rel_density    : Float, Relative circuit density (Area/Depth ratio).
+    [3] progress       : Float, Step / Max_Steps (0.0 -> 1.0).
+    [4] repeat_penalty : Float, Penalty intensity for repeating actions.
+    [5] is_bloated     : Float, 1.0 if Cur_Area > Init_Area, else 0.0.
+
+    [6-10] Action History (One-Hot Encoding):
+        [6] : Start / None
+        [7] : Rewrite
+        [8] : Balance
+        [9] : Resub
+        [10]: Refactor
+    -------------------------------------------------------
+    """
+    state = np.array([
+        norm_area, norm_depth, rel_density, progress,
+        repeat_penalty_feature, is_bloated
+    ], dtype=np.float32)
+
+    return np.concatenate((state, action_one_hot))
+
+
+def improvement_reward(mode, prev_area, prev_depth, cur_area, cur_depth):
+    """ Mode specific part of the step reward (before the shared penalties) """
+    w_area, w_depth, p_area, p_depth = REWARD_WEIGHTS[mode]
+    reward = 0.0
+
+    area_imp = (prev_area - cur_area) / prev_area if prev_area != 0 else 0.0
+    depth_imp = (prev_depth - cur_depth) / prev_depth if prev_depth != 0 else 0.0
+
+    score = (w_area * area_imp) + (w_depth * depth_imp)
+    if score > 0: reward += score * 60.0
+    else: reward += score * 30.0
+
+    if cur_area > prev_area and prev_area != 0: reward -= p_area * (cur_area / prev_area)
+    if cur_depth > prev_depth and prev_depth != 0: reward -= p_depth * (cur_depth / prev_depth)
+    return reward
+
+
+def is_success(mode, cur_area, cur_depth, initial_area, initial_depth):
+    if mode == 'depth':
+        return cur_area < initial_area * 1.1 and cur_depth < initial_depth * 0.75
+    elif mode == 'area':
+        return cur_area < initial_area * 0.8 and cur_depth <= initial_depth * 1.1
+    elif mode == 'balanced':
+        return cur_area < initial_area * 0.9 and cur_depth < initial_depth * 0.85
+    return False
+
+
+def is_bloated(mode, cur_area, initial_area):
+    return cur_area > initial_area * BLOAT_LIMITS[mode]
+
+
+def configure_manager(mgr):
+    """ Apply the MigManager tuning knobs from config.py """
+    mgr.set_compaction_threshold(cfg.MIG_COMPACTION_THRESHOLD)
+    mgr.set_parallel_options(
+        cfg.PARALLEL_GATE_THRESHOLD, cfg.PARALLEL_THREADS,
+        cfg.PARALLEL_PARTITIONS, cfg.PARALLEL_DETERMINISTIC
+    )
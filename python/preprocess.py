@@ -0,0 +1,194 @@
+"""
+Benchmark 预处理 (替代原来串行的 preprocess.sh):
+    Verilog --(Yosys / ABC 清洗)--> AIGER, 可以直接被 MigManager 加载。
+
+- 进程池并行, 每个任务有独立超时
+- 输出目录下的 preprocess_manifest.json 记录每个输入的内容哈希、耗时和失败原因,
+  内容未变化 (且脚本未变化) 的输入直接跳过
+
+用法: python python/preprocess.py [--input DIR] [--output DIR] [--tool yosys|abc] [--jobs N]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config as cfg
+from dataset_index import file_sha256, read_aiger_header
+
+# {src} / {dst} 会被替换为输入 / 输出路径
+TOOL_SCRIPTS = {
+    # 综合 -> 只含 AND 的门级网表 -> AIG
+    # MigManager 只处理组合逻辑: dffunmap + expose -evert-dff 把寄存器切开 (Q 变 PI, D 变 PO), 不留 latch
+    "yosys": "read_verilog {src}; synth -flatten; dffunmap; expose -evert-dff; abc -g AND; aigmap; write_aiger {dst}",
+    # read_verilog: 读取原始 Verilog, strash: 结构化哈希, comb: 去掉锁存器
+    "abc": "read_verilog {src}; strash; comb; write_aiger {dst}",
+}
+
+MANIFEST_NAME = "preprocess_manifest.json"
+
+# 不是由输入本身决定的失败, 不缓存
+RETRY_STATUSES = ("timeout", "error")
+
+
+def build_command(tool, src, dst):
+    script = TOOL_SCRIPTS[tool].format(src=src, dst=dst)
+    if tool == "yosys":
+        return [cfg.YOSYS_BINARY_PATH, "-q", "-p", script]
+    return [cfg.ABC_BINARY_PATH, "-c", script]
+
+
+def script_hash(tool):
+    return hashlib.sha256(TOOL_SCRIPTS[tool].encode("utf-8")).hexdigest()[:16]
+
+
+def run_job(src, dst, sha, tool, timeout):
+    """ 在 worker 进程中执行一个清洗任务, 返回 manifest 记录 """
+    record = {
+        "output": os.path.basename(dst),
+        "sha256": sha,
+        "tool": tool,
+        "script": script_hash(tool),
+        "status": "failed",
+        "error": None,
+    }
+    start = time.time()
+    try:
+        tmp_dst = dst + ".tmp"
+        result = subprocess.run(
+            build_command(tool, src, tmp_dst),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        if result.returncode == 0 and os.path.exists(tmp_dst):
+            header = read_aiger_header(tmp_dst)
+            if header["num_latches"] > 0:
+                record["error"] = f"Output still has {header['num_latches']} latches"
+                os.remove(tmp_dst)
+            else:
+                os.replace(tmp_dst, dst)
+                record["status"] = "ok"
+        else:
+            err = (result.stderr or result.stdout).strip().splitlines()
+            record["error"] = f"exit code {result.returncode}: {err[-1] if err else ''}"
+            if os.path.exists(tmp_dst):
+                os.remove(tmp_dst)
+    except subprocess.TimeoutExpired:
+        # 可能只是机器负载高, 下次重新尝试
+        record["status"] = "timeout"
+        record["error"] = f"Timeout after {timeout}s"
+    except Exception as e:
+        # 例如找不到 yosys / abc, 是环境问题而不是输入的问题
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["time"] = round(time.time() - start, 3)
+    return record
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(record, sha, tool, output_dir):
+    if (record is None or record.get("sha256") != sha
+            or record.get("tool") != tool or record.get("script") != script_hash(tool)):
+        return False
+    # 内容没变的失败输入不再重试 (--force 可以强制重跑), 超时 / 环境错误每次都重试
+    if record.get("status") in RETRY_STATUSES:
+        return False
+    return record.get("status") != "ok" or os.path.exists(os.path.join(output_dir, record["output"]))
+
+
+def preprocess(input_dir, output_dir, tool="yosys", jobs=None, timeout=None, force=False):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs or cfg.NUM_CPU
+    timeout = timeout or cfg.PREPROCESS_TIMEOUT
+
+    manifest = load_manifest(output_dir)
+    sources = sorted(glob.glob(os.path.join(input_dir, "*.v")))
+    if not sources:
+        print(f"[!] No .v files found in {input_dir}")
+        return manifest
+
+    todo = []
+    for src in sources:
+        name = os.path.basename(src)
+        sha = file_sha256(src)
+        if not force and is_up_to_date(manifest.get(name), sha, tool, output_dir):
+            continue
+        dst = os.path.join(output_dir, os.path.splitext(name)[0] + ".aig")
+        todo.append((name, src, dst, sha))
+
+    print(f"[*] {len(sources)} inputs, {len(sources) - len(todo)} up to date, "
+          f"{len(todo)} to process with {tool} ({jobs} workers, timeout {timeout}s)")
+
+    ok_count = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_job, src, dst, sha, tool, timeout): name for name, src, dst, sha in todo}
+        for i, future in enumerate(as_completed(futures)):
+            name = futures[future]
+            record = future.result()
+            manifest[name] = record
+            # 每完成一个就落盘, 中断后下次可以继续
+            save_manifest(output_dir, manifest)
+
+            if record["status"] == "ok":
+                ok_count += 1
+                print(f"[{i+1}/{len(todo)}] Success: {name} ({record['time']:.2f}s)")
+            else:
+                failed.append(name)
+                print(f"[{i+1}/{len(todo)}] Failed:  {name} ({record['error']})")
+
+    # 删除已经不存在的输入
+    names = {os.path.basename(s) for s in sources}
+    for name in list(manifest):
+        if name not in names:
+            del manifest[name]
+    save_manifest(output_dir, manifest)
+
+    print(f"Done! {ok_count} processed, {len(failed)} failed. Cleaned benchmarks are in {output_dir}")
+    stale_failures = [n for n, r in manifest.items() if r.get("status") != "ok" and n not in failed]
+    if stale_failures:
+        print(f"[!] {len(stale_failures)} unchanged inputs failed in an earlier run (use --force to retry)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean Verilog benchmarks into loadable AIGER files")
+    parser.add_argument("--input", default=cfg.PREPROCESS_INPUT_DIR)
+    parser.add_argument("--output", default=cfg.PREPROCESS_OUTPUT_DIR)
+    parser.add_argument("--tool", choices=sorted(TOOL_SCRIPTS), default=cfg.PREPROCESS_TOOL)
+    parser.add_argument("--jobs", type=int, default=cfg.NUM_CPU)
+    parser.add_argument("--timeout", type=int, default=cfg.PREPROCESS_TIMEOUT)
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and redo every file")
+    args = parser.parse_args()
+
+    manifest = preprocess(args.input, args.output, args.tool, args.jobs, args.timeout, args.force)
+    if any(r.get("status") != "ok" for r in manifest.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import os
 import time
-import glob
+import json
 import pandas as pd
 import subprocess
 from stable_baselines3 import PPO
 from mig_opt_env import MigOptEnv
+from dataset_index import list_circuits, load_index, get_entry, file_sha256
 
 # 【核心】导入配置文件
 import config as cfg
@@ -12,6 +13,60 @@ import config as cfg
 # MAX_STEPS 依然可以在这里微调
 MAX_STEPS = 40 
 
+# CSV 列顺序，把 Power 放在 Depth 后面
+SUMMARY_COLUMNS = ["Circuit", "Mode", 
+                   "Init_Gates", "Final_Gates", "Gate_Imp(%)", 
+                   "Init_Depth", "Final_Depth", "Depth_Imp(%)",
+                   "Init_WSA", "Final_WSA", "WSA_Imp(%)",
+                   "CEC_Check", "Time(s)", "Steps"]
+
+def get_ledger_path():
+    return os.path.join(cfg.RESULTS_DIR, f"benchmark_ledger_{cfg.CURRENT_MODE}.jsonl")
+
+def get_output_path(aig_file):
+    filename = os.path.basename(aig_file)
+    return os.path.join(cfg.RESULTS_DIR, filename.replace(".aig", f"_opt_{cfg.CURRENT_MODE}.aig"))
+
+def load_ledger(ledger_path):
+    """ 读取 JSONL 账本，同一个电路以最后一条记录为准 """
+    entries = {}
+    if not os.path.exists(ledger_path):
+        return entries
+    with open(ledger_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 被中断时可能留下半行，忽略即可
+                continue
+            entries[entry["Circuit"]] = entry
+    return entries
+
+def append_ledger(ledger_path, entry):
+    """ 每个电路结束后立即追加并落盘 """
+    with open(ledger_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def is_finished(entry, input_hash, model_hash, aig_file):
+    """ 账本记录与输入哈希、模型哈希、模式一致，且优化后的 .aig 仍然存在 """
+    return (entry is not None
+            and entry.get("Input_Hash") == input_hash
+            and entry.get("Model_Hash") == model_hash
+            and entry.get("Mode") == cfg.CURRENT_MODE
+            and os.path.exists(get_output_path(aig_file)))
+
+def write_summary_csv(ledger_entries, csv_path):
+    df = pd.DataFrame(list(ledger_entries.values()))
+    # 确保 DataFrame 包含所有列再排序，防止报错
+    df = df.reindex(columns=SUMMARY_COLUMNS)
+    df.to_csv(csv_path, index=False)
+    return df
+
 def verify_equivalence(original_path, optimized_path):
     """ 调用 ABC 进行逻辑等价性检查 (CEC) """
     if not os.path.exists(cfg.ABC_BINARY_PATH):
@@ -113,8 +168,7 @@ def evaluate_single_circuit(model, aig_file):
     elapsed_time = time.time() - start_time
     
     # 1. 保存优化后的电路
-    new_filename = filename.replace(".aig", f"_opt_{cfg.CURRENT_MODE}.aig")
-    save_path = os.path.join(cfg.RESULTS_DIR, new_filename)
+    save_path = get_output_path(aig_file)
     env.mig_manager.save(save_path)
     
     # 2. 验证电路
@@ -173,9 +227,11 @@ def main():
 
     print(f"Loading model: {cfg.MODEL_PATH} ...")
     model = PPO.load(cfg.MODEL_PATH, device="cpu")
+    # 重新训练后模型哈希变化, 旧的账本记录不会被复用
+    model_hash = file_sha256(cfg.MODEL_PATH + ".zip")
 
     # 2. 获取测试文件
-    files = glob.glob(cfg.TEST_DATA_DIR)
+    files = list_circuits(cfg.TEST_DATA_DIR, include_timeouts=True)
     if not files:
         print(f"[Error] No .aig files found in {cfg.TEST_DATA_DIR}")
         return
@@ -183,35 +239,50 @@ def main():
     print(f"Found {len(files)} circuits. Testing Mode: {cfg.CURRENT_MODE.upper()}")
     print(f"Results will be saved to: {cfg.RESULTS_DIR}\n")
     
-    # 3. 批量测试
-    results_list = []
+    # 3. 批量测试 (结果逐个写入账本, 支持断点续跑)
+    ledger_path = get_ledger_path()
+    csv_path = os.path.join(cfg.RESULTS_DIR, f"benchmark_summary_{cfg.CURRENT_MODE}.csv")
+    ledger = load_ledger(ledger_path) if cfg.TEST_RESUME else {}
+    # 其它模型的结果、以及已经不在测试集中的电路不进入本次汇总
+    current = {os.path.basename(f) for f in files}
+    ledger = {k: v for k, v in ledger.items() if v.get("Model_Hash") == model_hash and k in current}
+    index = load_index()
+    if not cfg.TEST_RESUME and os.path.exists(ledger_path):
+        os.remove(ledger_path)
+
+    skipped = 0
     for i, aig_file in enumerate(files):
         print(f"[{i+1}/{len(files)}] ", end="")
+        filename = os.path.basename(aig_file)
+        entry = get_entry(index, aig_file)
+        input_hash = entry["sha256"] if entry else file_sha256(aig_file)
+
+        if cfg.TEST_RESUME and is_finished(ledger.get(filename), input_hash, model_hash, aig_file):
+            print(f"Skipping:   {filename:<30} | already in {os.path.basename(ledger_path)}")
+            skipped += 1
+            continue
+
         try:
             res = evaluate_single_circuit(model, aig_file)
-            results_list.append(res)
         except Exception as e:
             print(f"[Critical Error] Failed on {aig_file}: {e}")
+            continue
 
-    # 4. 生成汇总 CSV
-    if results_list:
-        df = pd.DataFrame(results_list)
-        csv_name = f"benchmark_summary_{cfg.CURRENT_MODE}.csv"
-        csv_path = os.path.join(cfg.RESULTS_DIR, csv_name)
-        
-        # 调整列顺序，把 Power 放在 Depth 后面
-        cols = ["Circuit", "Mode", 
-                "Init_Gates", "Final_Gates", "Gate_Imp(%)", 
-                "Init_Depth", "Final_Depth", "Depth_Imp(%)",
-                "Init_WSA", "Final_WSA", "WSA_Imp(%)",
-                "CEC_Check", "Time(s)", "Steps"]
-        # 确保 DataFrame 包含所有列再排序，防止报错
-        df = df.reindex(columns=cols)
-        
-        df.to_csv(csv_path, index=False)
+        res["Input_Hash"] = input_hash
+        res["Model_Hash"] = model_hash
+        append_ledger(ledger_path, res)
+        ledger[filename] = res
+        # 4. 增量更新汇总 CSV
+        write_summary_csv(ledger, csv_path)
+
+    # 5. 汇总报告
+    if ledger:
+        df = write_summary_csv(ledger, csv_path)
         
         print("="*60)
         print(f"FINAL REPORT: {csv_path}")
+        if skipped:
+            print(f"Resumed: {skipped} circuits reused from {ledger_path}")
         print(f"Pass Rate: {len(df[df['CEC_Check']=='PASS'])}/{len(files)}")
         print("="*60)
 
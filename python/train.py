@@ -1,10 +1,11 @@
 import os
 import time
-import glob
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.vec_env import SubprocVecEnv, DummyVecEnv
 from mig_opt_env import MigOptEnv
+from trajectory import TrajectoryRecorder
+from dataset_index import list_circuits
 
 # 【核心】导入配置文件，所有路径和模式都在这里管理
 import config as cfg
@@ -41,8 +42,8 @@ def print_performance_report(initial_metrics, final_metrics):
 
 def train():
     # 1. 获取数据集
-    all_circuits = glob.glob(cfg.DATASET_PATH)
-    train_circuits = [f for f in all_circuits if "new" not in f and "_opt" not in f]
+    train_circuits = list_circuits(cfg.DATASET_PATH, exclude=("new", "_opt"),
+                                   include_timeouts=not cfg.TRAIN_EXCLUDE_TIMEOUTS)
     
     if not train_circuits:
         print(f"[Error] No training circuits found in {cfg.DATASET_PATH}")
@@ -55,14 +56,22 @@ def train():
     print(f"Description:  {cfg.CURRENT_CONFIG['desc']}")
     print(f"Save Path:    {cfg.MODEL_PATH}.zip")
     print(f"Dataset Size: {len(train_circuits)} circuits")
+    if cfg.TRAIN_EXCLUDE_TIMEOUTS:
+        print(f"Excluded:     circuits that take > {cfg.DATASET_SCREEN_TIMEOUT}s to load (TRAIN_EXCLUDE_TIMEOUTS)")
     print(f"Device:       {cfg.DEVICE}")
+    if cfg.RECORD_TRAJECTORIES:
+        print(f"Trajectories: {cfg.TRAJECTORY_DIR}")
     print(f"{'='*60}\n")
     
     # 3. 创建环境
     vec_env_cls = DummyVecEnv 
 
+    def make_env():
+        recorder = TrajectoryRecorder(cfg.TRAJECTORY_DIR) if cfg.RECORD_TRAJECTORIES else None
+        return MigOptEnv(train_circuits, target_mode=cfg.CURRENT_MODE, recorder=recorder)
+
     env = make_vec_env(
-        lambda: MigOptEnv(train_circuits, target_mode=cfg.CURRENT_MODE), 
+        make_env, 
         n_envs=cfg.NUM_CPU, 
         vec_env_cls=vec_env_cls
     )
@@ -91,6 +100,8 @@ def train():
     
     end_time = time.time()
     duration = end_time - start_time
+    # 关闭环境, 把剩余的轨迹数据刷到磁盘
+    env.close()
     print(f"----------- Training Finished ({duration:.2f}s) -----------")
 
     # 5. 保存模型
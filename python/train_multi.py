@@ -0,0 +1,242 @@
+"""
+一次 rollout 同时训练 depth / area / balanced 三个模型。
+
+MigOptEnv.step 会在 info 中返回三种模式各自的 reward / terminated / truncated,
+所以同一批 (昂贵的) 综合动作可以同时喂给三个 PPO 模型:
+  - 第 i 个环境由 MODES[i % 3] 对应的模型选择动作, 三个模型轮流提供探索
+  - 每个模型用自己的 value 评估实际执行的动作, 写入各自的 RolloutBuffer
+  - 每个模型按自己模式的 episode 边界计算优势, 然后调用 PPO.train()
+
+对其它两个模型而言约 2/3 的数据来自另一个策略 (off-policy), 用截断的重要性权重修正
+(V-trace, ρ̄ = c̄ = 1):
+  - ρ_t = min(1, π_m(a|s) / π_behaviour(a|s))
+  - RolloutBuffer 中的旧 log_prob 记为 max(log π_behaviour, log π_m), 所以 PPO 的 ratio
+    一开始就等于 ρ_t (不会超过 1), 之后再受 clip 约束
+  - 优势沿轨迹向后传播时乘上后续步的 ρ, value 的目标为 V + ρ_t * A_t
+本模型自己选择的动作 ρ = 1, 与普通 PPO / GAE 完全相同。
+某个模式的 episode 已经结束但环境 (由另一个模式驱动) 还在继续时, 该模式在这个环境中的
+后续 transition 不参与训练, 直到环境 reset。
+总训练代价约为分别运行三次 train.py 的 1/3。
+"""
+import os
+import time
+import numpy as np
+import torch as th
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.logger import configure
+from stable_baselines3.common.buffers import RolloutBuffer
+from stable_baselines3.common.utils import obs_as_tensor
+
+from mig_opt_env import MigOptEnv
+from mig_opt_rules import MODES
+from dataset_index import list_circuits
+
+import config as cfg
+
+TOTAL_TIMESTEPS = 100000 # 每个模型看到的 transition 数, 与 train.py 相同
+
+
+class MaskedRolloutBuffer(RolloutBuffer):
+    """
+    RolloutBuffer whose get() skips the rows marked invalid in self.valid,
+    with returns / advantages corrected by the truncated importance weights in self.rho
+    """
+
+    def reset(self):
+        super().reset()
+        self.valid = np.ones((self.buffer_size, self.n_envs), dtype=bool)
+        self.rho = np.ones((self.buffer_size, self.n_envs), dtype=np.float32)
+
+    def compute_returns_and_advantage(self, last_values, dones):
+        # RolloutBuffer.compute_returns_and_advantage with V-trace style traces
+        last_values = last_values.clone().cpu().numpy().flatten()
+        last_gae_lam = 0
+        for step in reversed(range(self.buffer_size)):
+            if step == self.buffer_size - 1:
+                next_non_terminal = 1.0 - dones.astype(np.float32)
+                next_values = last_values
+                next_rho = 1.0
+            else:
+                next_non_terminal = 1.0 - self.episode_starts[step + 1]
+                next_values = self.values[step + 1]
+                next_rho = self.rho[step + 1]
+            delta = self.rewards[step] + self.gamma * next_values * next_non_terminal - self.values[step]
+            last_gae_lam = delta + self.gamma * self.gae_lambda * next_non_terminal * next_rho * last_gae_lam
+            self.advantages[step] = last_gae_lam
+        self.returns = self.values + self.rho * self.advantages
+
+    def get(self, batch_size=None):
+        assert self.full, ""
+        # same flattening as RolloutBuffer.get: (n_steps, n_envs, ...) -> (n_steps * n_envs, ...)
+        if not self.generator_ready:
+            for name in ["observations", "actions", "values", "log_probs", "advantages", "returns"]:
+                self.__dict__[name] = self.swap_and_flatten(self.__dict__[name])
+            self.valid = self.swap_and_flatten(self.valid).ravel()
+            self.generator_ready = True
+
+        indices = np.random.permutation(np.flatnonzero(self.valid))
+        if batch_size is None:
+            batch_size = len(indices)
+        start_idx = 0
+        while start_idx < len(indices):
+            yield self._get_samples(indices[start_idx : start_idx + batch_size])
+            start_idx += batch_size
+
+
+def make_model(env, mode):
+    model = PPO(
+        "MlpPolicy",
+        env,
+        rollout_buffer_class=MaskedRolloutBuffer,
+        verbose=0,
+        learning_rate=3e-4,
+        device=cfg.DEVICE,
+        n_steps=2048,
+        batch_size=512,
+        n_epochs=10,
+        ent_coef=0.05,
+        max_grad_norm=0.5,
+        policy_kwargs=dict(net_arch=dict(pi=[64, 64], vf=[64, 64])),
+    )
+    log_dir = os.path.join(cfg.PROJECT_ROOT, 'mig_opt_logs', f"{mode}_shared")
+    model.set_logger(configure(log_dir, ["csv", "tensorboard"]))
+    return model
+
+
+def bootstrap_value(model, obs):
+    """ V(s) for a single observation """
+    with th.no_grad():
+        obs_tensor = obs_as_tensor(obs[None], model.device)
+        return model.policy.predict_values(obs_tensor)[0].item()
+
+
+def collect_shared_rollouts(env, env_modes, models, obs, episode_starts, finished):
+    """
+    运行 n_steps 步, 把同一批 transition 写入每个模型的 RolloutBuffer
+    finished[m][i]: 模式 m 在环境 i 中已经结束, 环境 reset 之前的 transition 对 m 无效
+    """
+    n_envs = env.num_envs
+    n_steps = models[MODES[0]].n_steps
+    device = models[MODES[0]].device
+
+    for model in models.values():
+        model.policy.set_training_mode(False)
+        model.rollout_buffer.reset()
+
+    for step in range(n_steps):
+        obs_tensor = obs_as_tensor(obs, device)
+        with th.no_grad():
+            proposals = {m: models[m].policy(obs_tensor)[0].cpu().numpy() for m in MODES}
+        actions = np.array([proposals[env_modes[i]][i] for i in range(n_envs)])
+
+        actions_tensor = th.as_tensor(actions, device=device)
+        with th.no_grad():
+            evals = {m: models[m].policy.evaluate_actions(obs_tensor, actions_tensor) for m in MODES}
+
+        # 行为策略 (实际选择动作的模型) 的 log_prob
+        behaviour_log_probs = th.stack([evals[env_modes[i]][1][i] for i in range(n_envs)])
+
+        new_obs, _, dones, infos = env.step(actions)
+
+        for k, m in enumerate(MODES):
+            model = models[m]
+            valid = ~finished[m]
+            rewards = np.array([info["reward_vec"][k] for info in infos], dtype=np.float32)
+            terminated = np.array([info["terminated_vec"][k] for info in infos])
+            truncated = np.array([info["truncated_vec"][k] for info in infos])
+            mode_dones = terminated | truncated | dones
+            rewards[~valid] = 0.0
+
+            # 与 SB3 一致: 非 terminated 的结束 (截断 / 其它模式结束导致 reset) 用 V(s') 自举
+            for i in range(n_envs):
+                if valid[i] and mode_dones[i] and not terminated[i]:
+                    next_obs = infos[i]["terminal_observation"] if dones[i] else new_obs[i]
+                    rewards[i] += model.gamma * bootstrap_value(model, next_obs)
+
+            values, log_probs, _ = evals[m]
+            # PPO ratio = π_new / max(π_behaviour, π_m), 即从截断的 ρ 开始
+            old_log_probs = th.maximum(log_probs, behaviour_log_probs)
+            model.rollout_buffer.rho[step] = th.exp(log_probs - old_log_probs).cpu().numpy()
+            model.rollout_buffer.valid[step] = valid
+            model.rollout_buffer.add(obs, actions.reshape(-1, 1), rewards, episode_starts[m], values, old_log_probs)
+            episode_starts[m] = mode_dones
+            # 模式 m 结束但环境还在继续: 屏蔽到环境 reset 为止
+            finished[m] = (finished[m] | mode_dones) & ~dones
+
+        obs = new_obs
+
+    with th.no_grad():
+        obs_tensor = obs_as_tensor(obs, device)
+        for m in MODES:
+            last_values = models[m].policy.predict_values(obs_tensor)
+            models[m].rollout_buffer.compute_returns_and_advantage(last_values=last_values, dones=episode_starts[m])
+
+    return obs
+
+
+def train_shared():
+    # 1. 获取数据集
+    train_circuits = list_circuits(cfg.DATASET_PATH, exclude=("new", "_opt"),
+                                   include_timeouts=not cfg.TRAIN_EXCLUDE_TIMEOUTS)
+    if not train_circuits:
+        print(f"[Error] No training circuits found in {cfg.DATASET_PATH}")
+        return None
+
+    n_envs = max(cfg.NUM_CPU, len(MODES))
+    env_modes = [MODES[i % len(MODES)] for i in range(n_envs)]
+
+    print(f"\n{'='*60}")
+    print(f"STARTING SHARED-ROLLOUT TRAINING SESSION")
+    print(f"Modes:        {', '.join(m.upper() for m in MODES)}")
+    print(f"Dataset Size: {len(train_circuits)} circuits")
+    if cfg.TRAIN_EXCLUDE_TIMEOUTS:
+        print(f"Excluded:     circuits that take > {cfg.DATASET_SCREEN_TIMEOUT}s to load (TRAIN_EXCLUDE_TIMEOUTS)")
+    print(f"Envs:         {n_envs} ({', '.join(env_modes)})")
+    print(f"Device:       {cfg.DEVICE}")
+    print(f"{'='*60}\n")
+
+    # 2. 创建环境 (每个环境的 episode 跟随其驱动模式)
+    env = DummyVecEnv([
+        (lambda mode=mode: MigOptEnv(train_circuits, target_mode=mode)) for mode in env_modes
+    ])
+
+    # 3. 定义模型
+    models = {m: make_model(env, m) for m in MODES}
+
+    obs = env.reset()
+    episode_starts = {m: np.ones(n_envs, dtype=bool) for m in MODES}
+    finished = {m: np.zeros(n_envs, dtype=bool) for m in MODES}
+
+    start_time = time.time()
+    num_timesteps = 0
+    iteration = 0
+    while num_timesteps < TOTAL_TIMESTEPS:
+        obs = collect_shared_rollouts(env, env_modes, models, obs, episode_starts, finished)
+        num_timesteps += models[MODES[0]].n_steps * n_envs
+        iteration += 1
+
+        for m in MODES:
+            model = models[m]
+            model.num_timesteps = num_timesteps
+            model._current_progress_remaining = max(0.0, 1.0 - num_timesteps / TOTAL_TIMESTEPS)
+            model.train()
+            model.logger.record("time/iterations", iteration)
+            model.logger.dump(step=num_timesteps)
+
+        print(f"[{num_timesteps}/{TOTAL_TIMESTEPS}] iteration {iteration} | {time.time() - start_time:.1f}s")
+
+    env.close()
+    print(f"----------- Training Finished ({time.time() - start_time:.2f}s) -----------")
+
+    # 4. 保存模型 (与 train.py 相同的文件名, test.py 可以直接使用)
+    for m in MODES:
+        path = os.path.join(cfg.MODEL_DIR, cfg.MODE_CONFIGS[m]["model_name"])
+        models[m].save(path)
+        print(f"Model saved successfully to: {path}.zip")
+
+    return models
+
+
+if __name__ == '__main__':
+    train_shared()
@@ -0,0 +1,220 @@
+"""
+On-disk trajectory store.
+
+Layout (one directory per flushed chunk, one .npy file per column):
+
+    <root>/chunk_<writer>_<seq>/
+        circuit_id.npy   uint32   crc32 of the circuit file name
+        step.npy         int32
+        obs.npy          float32  (N, 11), observation BEFORE the action
+        action.npy       int8
+        reward.npy       float32
+        area.npy         float32  after the action
+        depth.npy        float32  after the action
+        wsa.npy          float32  after the action
+        latency.npy      float32  seconds spent inside the C++ action
+        done.npy         bool     episode ended on this transition
+        meta.json        {"rows": N, "circuits": {id: name}}
+
+Chunks are written to a temporary directory and renamed into place, so a
+reader never sees a half-written chunk. Every column can be opened with
+np.load(..., mmap_mode='r').
+"""
+import os
+import json
+import uuid
+import zlib
+import queue
+import threading
+import numpy as np
+
+
+OBS_DIM = 11
+
+COLUMNS = {
+    "circuit_id": (np.uint32, ()),
+    "step": (np.int32, ()),
+    "obs": (np.float32, (OBS_DIM,)),
+    "action": (np.int8, ()),
+    "reward": (np.float32, ()),
+    "area": (np.float32, ()),
+    "depth": (np.float32, ()),
+    "wsa": (np.float32, ()),
+    "latency": (np.float32, ()),
+    "done": (np.bool_, ()),
+}
+
+
+def circuit_id(name):
+    """ Stable id of a circuit, shared by every writer process """
+    return zlib.crc32(os.path.basename(name).encode("utf-8")) & 0xFFFFFFFF
+
+
+class TrajectoryRecorder:
+    def __init__(self, root, chunk_size=4096, background=True):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.background = background
+        os.makedirs(self.root, exist_ok=True)
+
+        # several envs may write into the same root, keep chunk names unique
+        self.writer_id = uuid.uuid4().hex[:8]
+        self.chunk_seq = 0
+
+        self._buffer = {name: [] for name in COLUMNS}
+        self._circuits = {}
+        self._closed = False
+
+        self._queue = None
+        self._thread = None
+        if self.background:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._flush_worker, daemon=True)
+            self._thread.start()
+
+    def record(self, circuit, step, obs, action, reward, area, depth, wsa, latency, done=False):
+        cid = circuit_id(circuit)
+        self._circuits[cid] = os.path.basename(circuit)
+
+        self._buffer["circuit_id"].append(cid)
+        self._buffer["step"].append(step)
+        self._buffer["obs"].append(np.asarray(obs, dtype=np.float32))
+        self._buffer["action"].append(int(action))
+        self._buffer["reward"].append(reward)
+        self._buffer["area"].append(area)
+        self._buffer["depth"].append(depth)
+        self._buffer["wsa"].append(wsa)
+        self._buffer["latency"].append(latency)
+        self._buffer["done"].append(bool(done))
+
+        if len(self._buffer["step"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """ Hand the buffered rows over to the writer (thread) """
+        if not self._buffer["step"]:
+            return
+
+        columns = {}
+        for name, (dtype, shape) in COLUMNS.items():
+            columns[name] = np.asarray(self._buffer[name], dtype=dtype).reshape((-1,) + shape)
+        circuits = dict(self._circuits)
+
+        self._buffer = {name: [] for name in COLUMNS}
+        self._circuits = {}
+
+        chunk_name = f"chunk_{self.writer_id}_{self.chunk_seq:05d}"
+        self.chunk_seq += 1
+
+        if self.background:
+            self._queue.put((chunk_name, columns, circuits))
+        else:
+            self._write_chunk(chunk_name, columns, circuits)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self.background:
+            self._queue.put(None)
+            self._thread.join()
+
+    def _flush_worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write_chunk(*item)
+            except Exception as e:
+                print(f"[Trajectory] Failed to write {item[0]}: {e}")
+
+    def _write_chunk(self, chunk_name, columns, circuits):
+        final_dir = os.path.join(self.root, chunk_name)
+        tmp_dir = final_dir + ".tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        for name, arr in columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arr)
+
+        meta = {
+            "rows": int(len(columns["step"])),
+            "circuits": {str(k): v for k, v in circuits.items()},
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        os.rename(tmp_dir, final_dir)
+
+
+class TrajectoryReader:
+    def __init__(self, root):
+        self.root = root
+        self.chunks = []
+        self.circuits = {}
+
+        if not os.path.isdir(root):
+            return
+
+        for entry in sorted(os.listdir(root)):
+            chunk_dir = os.path.join(root, entry)
+            meta_path = os.path.join(chunk_dir, "meta.json")
+            if not entry.startswith("chunk_") or entry.endswith(".tmp") or not os.path.exists(meta_path):
+                continue
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.chunks.append((chunk_dir, meta["rows"]))
+            for k, v in meta["circuits"].items():
+                self.circuits[int(k)] = v
+
+    def __len__(self):
+        return sum(rows for _, rows in self.chunks)
+
+    def load_chunk(self, chunk_dir, fields=None):
+        """ Memory-mapped columns of a single chunk """
+        fields = fields or list(COLUMNS)
+        return {
+            name: np.load(os.path.join(chunk_dir, f"{name}.npy"), mmap_mode="r")
+            for name in fields
+        }
+
+    def iter_minibatches(self, batch_size, fields=None, shuffle=True, seed=None):
+        """
+        Yield dicts of column arrays with batch_size rows each (the last one may be smaller).
+        Only the chunks that are currently being consumed are touched, rows are copied
+        out of the memmap on demand.
+        """
+        rng = np.random.default_rng(seed)
+        order = np.arange(len(self.chunks))
+        if shuffle:
+            rng.shuffle(order)
+
+        pending = []
+        pending_rows = 0
+        for ci in order:
+            chunk_dir, rows = self.chunks[ci]
+            cols = self.load_chunk(chunk_dir, fields)
+            idx = rng.permutation(rows) if shuffle else np.arange(rows)
+
+            start = 0
+            while start < rows:
+                take = min(batch_size - pending_rows, rows - start)
+                sel = np.sort(idx[start:start + take])
+                pending.append({name: np.asarray(arr[sel]) for name, arr in cols.items()})
+                pending_rows += take
+                start += take
+
+                if pending_rows == batch_size:
+                    yield self._concat(pending)
+                    pending = []
+                    pending_rows = 0
+
+        if pending:
+            yield self._concat(pending)
+
+    @staticmethod
+    def _concat(parts):
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
@@ -4,6 +4,8 @@
 #include <cstdint>
 #include <memory> 
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
 
 // IO
 #include <mockturtle/io/aiger_reader.hpp>
@@ -16,6 +18,7 @@
 // Views
 #include <mockturtle/views/depth_view.hpp>
 #include <mockturtle/views/fanout_view.hpp>
+#include <mockturtle/views/topo_view.hpp>
 
 // Algorithms
 #include <mockturtle/algorithms/mig_resub.hpp>
@@ -27,9 +30,25 @@
 #include <mockturtle/algorithms/balancing/sop_balancing.hpp>
 #include <mockturtle/algorithms/cleanup.hpp>
 
+#include <kitty/constructors.hpp>
+#include <kitty/dynamic_truth_table.hpp>
+#include <kitty/operators.hpp>
+
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <cctype>
+#include <chrono>
+#include <exception>
 #include <iostream>
+#include <limits>
 #include <lorina/aiger.hpp>
+#include <random>
+#include <stdexcept>
 #include <string>
+#include <system_error>
+#include <thread>
+#include <unordered_map>
 #include <vector>
 
 namespace py = pybind11;
@@ -41,78 +60,186 @@ public:
   std::vector<mockturtle::mig_network::signal> node_map;
   std::vector<bool> is_mapped;
 
+  // compact when live / allocated nodes drops below this ratio (<= 0 disables)
+  double compaction_threshold = 0.7;
+  uint32_t num_compactions = 0;
+
+  // refactor / resub run on PO partitions in parallel above this size (0 disables)
+  uint32_t parallel_gate_threshold = 100000;
+  uint32_t num_threads = 0;     // 0 -> std::thread::hardware_concurrency()
+  uint32_t num_partitions = 8;  // used in deterministic mode
+  bool deterministic = true;    // partitioning independent of the thread count
+
+  // long-lived views over *mig, kept current through the network events
+  using depth_mig_t = mockturtle::depth_view<mockturtle::mig_network>;
+  using fanout_mig_t = mockturtle::fanout_view<depth_mig_t>;
+  using mig_events_t = mockturtle::network_events<mockturtle::mig_network>;
+
+  std::unique_ptr<depth_mig_t> depth_mig;
+  std::unique_ptr<fanout_mig_t> fanout_mig;
+  std::shared_ptr<typename mig_events_t::add_event_type> level_add_event;
+  std::shared_ptr<typename mig_events_t::modified_event_type> level_modified_event;
+
   MigManager(std::string filename) {
     load_file(filename);
   }
 
+  // the event handlers capture this
+  MigManager(MigManager const&) = delete;
+  MigManager& operator=(MigManager const&) = delete;
+
+  ~MigManager() {
+    release_views();
+  }
+
   void load_file(std::string filename) {
-    mig.reset(); 
+    // start from an empty network with bound views, so a failed parse leaves the manager usable
+    if (!mig) mig = std::make_unique<mockturtle::mig_network>();
+    replace_network(mockturtle::mig_network());
     node_map.clear();
     is_mapped.clear();
 
-    mig = std::make_unique<mockturtle::mig_network>();
-
     mockturtle::aig_network aig;
     if (lorina::read_aiger(filename, mockturtle::aiger_reader(aig)) != lorina::return_code::success) {
       throw std::runtime_error("Failed to parse AIGER file: " + filename);
     }
 
+    // build into a separate network and swap it in only once it is complete
+    mockturtle::mig_network ntk;
+
     uint32_t max_idx = 0;
     aig.foreach_node([&](auto n) {
       if (aig.node_to_index(n) > max_idx) max_idx = aig.node_to_index(n);
     });
     
-    node_map.resize(max_idx + 1, mig->get_constant(false));
+    node_map.resize(max_idx + 1, ntk.get_constant(false));
     is_mapped.resize(max_idx + 1, false);
 
     auto const_idx = aig.node_to_index(aig.get_node(aig.get_constant(false)));
-    node_map[const_idx] = mig->get_constant(false);
+    node_map[const_idx] = ntk.get_constant(false);
     is_mapped[const_idx] = true;
 
     aig.foreach_pi([&](auto n) {
-      auto mig_pi = mig->create_pi();
+      auto mig_pi = ntk.create_pi();
       node_map[aig.node_to_index(n)] = mig_pi;
       is_mapped[aig.node_to_index(n)] = true;
     });
 
     aig.foreach_po([&](auto f) {
       auto aig_node = aig.get_node(f);
-      auto mig_signal = get_mig_signal(aig, aig.node_to_index(aig_node));
+      auto mig_signal = get_mig_signal(aig, ntk, aig.node_to_index(aig_node));
       if (aig.is_complemented(f)) mig_signal = !mig_signal;
-      mig->create_po(mig_signal);
+      ntk.create_po(mig_signal);
     });
+
+    replace_network(std::move(ntk));
   }
 
-  mockturtle::mig_network::signal get_mig_signal(mockturtle::aig_network &aig, uint32_t node_idx) {
+  // ---------------------------------------------------------
+  // persistent depth / fanout views
+  // ---------------------------------------------------------
+  void bind_views() {
+    depth_mig = std::make_unique<depth_mig_t>(*mig);
+    fanout_mig = std::make_unique<fanout_mig_t>(*depth_mig);
+
+    // registered after the views, so fanout lists are already updated when these run
+    level_add_event = mig->events().register_add_event([this](auto const& n) {
+      depth_mig->resize_levels();
+      update_levels_from(n);
+    });
+    level_modified_event = mig->events().register_modified_event([this](auto const& n, auto const&) {
+      update_levels_from(n);
+    });
+  }
+
+  void release_views() {
+    if (depth_mig) {
+      // the view still holds the events of the network it was bound to
+      depth_mig->events().release_add_event(level_add_event);
+      depth_mig->events().release_modified_event(level_modified_event);
+    }
+    fanout_mig.reset();
+    depth_mig.reset();
+  }
+
+  // every path that swaps the managed network goes through here
+  void replace_network(mockturtle::mig_network&& ntk) {
+    release_views();
+    *mig = std::move(ntk);
+    bind_views();
+  }
+
+  // recompute the level of n and walk the transitive fanout while levels change
+  void update_levels_from(mockturtle::mig_network::node const& root) {
+    std::vector<mockturtle::mig_network::node> stack{root};
+    while (!stack.empty()) {
+      auto n = stack.back();
+      stack.pop_back();
+      if (!mig->is_maj(n) || mig->is_dead(n)) continue;
+
+      uint32_t l = 0;
+      mig->foreach_fanin(n, [&](auto const& f) {
+        l = std::max(l, depth_mig->level(mig->get_node(f)) + 1);
+      });
+      if (l == depth_mig->level(n)) continue;
+
+      depth_mig->set_level(n, l);
+      fanout_mig->foreach_fanout(n, [&](auto const& p) { stack.push_back(p); });
+    }
+  }
+
+  // POs can be redirected without an event, so the depth is taken from the PO levels on demand
+  uint32_t sync_depth() {
+    uint32_t d = 0;
+    mig->foreach_po([&](auto const& f) {
+      d = std::max(d, depth_mig->level(mig->get_node(f)));
+    });
+    depth_mig->set_depth(d);
+    fanout_mig->set_depth(d);
+    return d;
+  }
+
+  mockturtle::mig_network::signal get_mig_signal(mockturtle::aig_network &aig, mockturtle::mig_network &ntk, uint32_t node_idx) {
     if (is_mapped[node_idx]) return node_map[node_idx];
 
     auto n = aig.index_to_node(node_idx);
     std::vector<mockturtle::aig_network::signal> children;
     aig.foreach_fanin(n, [&](auto const &f) { children.push_back(f); });
+    // register outputs of sequential AIGER files have no fanin (only PIs are mapped)
+    if (children.size() != 2) {
+      throw std::runtime_error("Unsupported AIGER node (latches are not supported, run preprocess.py first)");
+    }
 
-    auto mig_f1 = get_mig_signal(aig, aig.node_to_index(aig.get_node(children[0])));
-    auto mig_f2 = get_mig_signal(aig, aig.node_to_index(aig.get_node(children[1])));
+    auto mig_f1 = get_mig_signal(aig, ntk, aig.node_to_index(aig.get_node(children[0])));
+    auto mig_f2 = get_mig_signal(aig, ntk, aig.node_to_index(aig.get_node(children[1])));
 
     if (aig.is_complemented(children[0])) mig_f1 = !mig_f1;
     if (aig.is_complemented(children[1])) mig_f2 = !mig_f2;
 
-    auto mig_node = mig->create_maj(mig_f1, mig_f2, mig->get_constant(false));
+    auto mig_node = ntk.create_maj(mig_f1, mig_f2, ntk.get_constant(false));
     node_map[node_idx] = mig_node;
     is_mapped[node_idx] = true;
     return mig_node;
   }
 
   // action
+  // never partitioned: boundary nodes would enter a partition as PIs at level 0,
+  // so depth rewriting would work on the wrong critical paths
   void rewrite() {
-    mockturtle::depth_view<mockturtle::mig_network> depth_mig(*mig);
-    mockturtle::mig_algebraic_depth_rewriting(depth_mig);
+    sync_depth();
+    mockturtle::mig_algebraic_depth_rewriting(*depth_mig);
+    maybe_compact();
   }
 
   void refactor() {
-    mockturtle::refactoring_params ps;
-    ps.allow_zero_gain = true;
-    mockturtle::akers_resynthesis<mockturtle::mig_network> resyn;
-    mockturtle::refactoring(*mig, resyn, ps);
+    if (use_partitions()) {
+      run_partitioned(refactor_network, [](mockturtle::mig_network const& before, mockturtle::mig_network const& after) {
+        return after.num_gates() <= before.num_gates();
+      });
+    } else {
+      refactor_network(*mig);
+    }
+    maybe_compact();
   }
 
   void balance() {
@@ -138,23 +265,824 @@ public:
     auto balanced_aig = mockturtle::balancing(aig, strategy, ps);
 
     auto new_mig_obj = mockturtle::node_resynthesis<mockturtle::mig_network>(balanced_aig, resyn_aig2mig);
-    mig = std::make_unique<mockturtle::mig_network>(std::move(new_mig_obj));
 
     if (!is_huge) {
-        mockturtle::depth_view<mockturtle::mig_network> depth_mig(*mig);
-        mockturtle::mig_algebraic_depth_rewriting(depth_mig);
+        replace_network(std::move(new_mig_obj));
+        sync_depth();
+        mockturtle::mig_algebraic_depth_rewriting(*depth_mig);
     } else {
-        auto cleaned_mig = mockturtle::cleanup_dangling(*mig);
-        mig = std::make_unique<mockturtle::mig_network>(std::move(cleaned_mig));
+        replace_network(mockturtle::cleanup_dangling(new_mig_obj));
     }
+    maybe_compact();
   }
 
   void resub() {
+    if (use_partitions()) {
+      run_partitioned(resub_network, [](mockturtle::mig_network const& before, mockturtle::mig_network const& after) {
+        return after.num_gates() <= before.num_gates();
+      });
+    } else {
+      sync_depth();
+      mockturtle::mig_resubstitution(*fanout_mig, resub_params());
+    }
+    maybe_compact();
+  }
+
+  // single-network passes, shared by the sequential and the partitioned path
+  static void refactor_network(mockturtle::mig_network& ntk) {
+    mockturtle::refactoring_params ps;
+    ps.allow_zero_gain = true;
+    mockturtle::akers_resynthesis<mockturtle::mig_network> resyn;
+    mockturtle::refactoring(ntk, resyn, ps);
+  }
+
+  static mockturtle::resubstitution_params resub_params() {
     mockturtle::resubstitution_params ps;
     ps.max_inserts = 1; 
-    mockturtle::depth_view<mockturtle::mig_network> depth_mig(*mig);
+    return ps;
+  }
+
+  static void resub_network(mockturtle::mig_network& ntk) {
+    mockturtle::depth_view<mockturtle::mig_network> depth_mig(ntk);
     mockturtle::fanout_view<mockturtle::depth_view<mockturtle::mig_network>> view(depth_mig);
-    mockturtle::mig_resubstitution(view, ps);
+    mockturtle::mig_resubstitution(view, resub_params());
+  }
+
+  // ---------------------------------------------------------
+  // partitioned (multi-threaded) execution for huge circuits
+  // ---------------------------------------------------------
+  // POs are split into contiguous groups. Every gate is owned by exactly one
+  // partition: the first group (in order) whose transitive fanin reaches it.
+  // A partition therefore only reads nodes owned by lower partitions, which
+  // enter its sub-network as extra PIs. Each partition is extracted into its
+  // own mig_network, optimized on a worker thread and stitched back in
+  // partition order, so the merge never depends on thread scheduling.
+  // Every partition is accepted or rejected on its own: a partition whose
+  // optimized version is worse is merged back unchanged.
+  struct partition {
+    std::vector<mockturtle::mig_network::node> boundary; // owned by lower partitions, become extra PIs
+    std::vector<mockturtle::mig_network::node> exports;  // owned here, used by POs or higher partitions
+    std::vector<mockturtle::mig_network::node> gates;    // owned here, in topological order
+  };
+
+  bool use_partitions() {
+    return parallel_gate_threshold > 0 && mig->num_gates() >= parallel_gate_threshold &&
+           resolve_num_partitions() > 1;
+  }
+
+  uint32_t resolve_num_threads() {
+    if (num_threads > 0) return num_threads;
+    return std::max(1u, std::thread::hardware_concurrency());
+  }
+
+  uint32_t resolve_num_partitions() {
+    // deterministic mode: the partitioning must not depend on the machine
+    uint32_t k = deterministic ? num_partitions : resolve_num_threads();
+    return std::min<uint32_t>(std::max(1u, k), mig->num_pos());
+  }
+
+  std::vector<partition> build_partitions(uint32_t k) {
+    using node = mockturtle::mig_network::node;
+    std::vector<partition> parts(k);
+
+    std::vector<node> po_nodes;
+    mig->foreach_po([&](auto const& f) { po_nodes.push_back(mig->get_node(f)); });
+
+    // 1. ownership by PO group
+    std::vector<int32_t> owner(mig->size(), -1);
+    std::vector<node> stack;
+    uint32_t num_pos = po_nodes.size();
+    for (uint32_t p = 0; p < k; ++p) {
+      uint32_t begin = (uint64_t)num_pos * p / k;
+      uint32_t end = (uint64_t)num_pos * (p + 1) / k;
+      for (uint32_t i = begin; i < end; ++i) stack.push_back(po_nodes[i]);
+
+      while (!stack.empty()) {
+        auto n = stack.back();
+        stack.pop_back();
+        auto idx = mig->node_to_index(n);
+        if (mig->is_constant(n) || mig->is_pi(n) || owner[idx] != -1) continue;
+        owner[idx] = p;
+        mig->foreach_fanin(n, [&](auto const& f) { stack.push_back(mig->get_node(f)); });
+      }
+    }
+
+    // 2. gates per partition in topological order, boundary and export sets
+    std::vector<int32_t> boundary_stamp(mig->size(), -1);
+    std::vector<bool> is_export(mig->size(), false);
+
+    mockturtle::topo_view<mockturtle::mig_network> topo(*mig);
+    topo.foreach_node([&](auto n) {
+      auto idx = mig->node_to_index(n);
+      if (owner[idx] < 0) return;
+      auto p = owner[idx];
+      parts[p].gates.push_back(n);
+
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->get_node(f);
+        auto cidx = mig->node_to_index(c);
+        if (owner[cidx] < 0 || owner[cidx] == p) return;
+        is_export[cidx] = true;
+        if (boundary_stamp[cidx] != p) {
+          boundary_stamp[cidx] = p;
+          parts[p].boundary.push_back(c);
+        }
+      });
+    });
+
+    for (auto n : po_nodes) {
+      if (owner[mig->node_to_index(n)] >= 0) is_export[mig->node_to_index(n)] = true;
+    }
+    for (auto& part : parts) {
+      for (auto n : part.gates) {
+        if (is_export[mig->node_to_index(n)]) part.exports.push_back(n);
+      }
+    }
+    return parts;
+  }
+
+  // read-only on *mig, safe to call from several worker threads
+  mockturtle::mig_network extract_partition(partition const& part) {
+    using signal = mockturtle::mig_network::signal;
+    mockturtle::mig_network sub;
+    std::unordered_map<uint32_t, signal> sub_of;
+
+    sub_of[mig->node_to_index(mig->get_node(mig->get_constant(false)))] = sub.get_constant(false);
+    mig->foreach_pi([&](auto n) { sub_of[mig->node_to_index(n)] = sub.create_pi(); });
+    for (auto n : part.boundary) sub_of[mig->node_to_index(n)] = sub.create_pi();
+
+    for (auto n : part.gates) {
+      std::array<signal, 3> children;
+      uint32_t i = 0;
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto s = sub_of.at(mig->node_to_index(mig->get_node(f)));
+        children[i++] = mig->is_complemented(f) ? !s : s;
+      });
+      sub_of[mig->node_to_index(n)] = sub.create_maj(children[0], children[1], children[2]);
+    }
+
+    for (auto n : part.exports) sub.create_po(sub_of.at(mig->node_to_index(n)));
+    return sub;
+  }
+
+  template<class OptimizeFn, class AcceptFn>
+  void run_partitioned(OptimizeFn&& optimize, AcceptFn&& accept) {
+    using signal = mockturtle::mig_network::signal;
+
+    uint32_t k = resolve_num_partitions();
+    auto parts = build_partitions(k);
+
+    // optimize every partition on the thread pool
+    std::vector<mockturtle::mig_network> subs(k);
+    std::atomic<uint32_t> next{0};
+    uint32_t n_threads = std::min(resolve_num_threads(), k);
+
+    // an exception escaping a std::thread would terminate the interpreter, rethrow it after join
+    std::vector<std::exception_ptr> errors(n_threads);
+    auto worker = [&](uint32_t t) {
+      try {
+        for (uint32_t p = next++; p < k; p = next++) {
+          auto original = extract_partition(parts[p]);
+          subs[p] = extract_partition(parts[p]);
+          optimize(subs[p]);
+          // cut boundaries can cost quality, keep the original partition if it got worse
+          if (!accept(original, subs[p])) subs[p] = std::move(original);
+        }
+      } catch (...) {
+        errors[t] = std::current_exception();
+        next = k; // stop the other workers early
+      }
+    };
+
+    std::vector<std::thread> pool;
+    for (uint32_t t = 1; t < n_threads; ++t) {
+      try {
+        pool.emplace_back(worker, t);
+      } catch (std::system_error const&) {
+        break; // out of threads, the remaining partitions run on the threads we have
+      }
+    }
+    worker(0);
+    for (auto& t : pool) t.join();
+    for (auto const& e : errors) {
+      if (e) std::rethrow_exception(e);
+    }
+
+    // merge back in partition order
+    mockturtle::mig_network merged;
+    std::unordered_map<uint32_t, signal> new_of;
+    std::vector<signal> pis;
+    mig->foreach_pi([&](auto n) {
+      auto s = merged.create_pi();
+      pis.push_back(s);
+      new_of[mig->node_to_index(n)] = s;
+    });
+    new_of[mig->node_to_index(mig->get_node(mig->get_constant(false)))] = merged.get_constant(false);
+
+    for (uint32_t p = 0; p < k; ++p) {
+      std::vector<signal> leaves(pis);
+      for (auto n : parts[p].boundary) leaves.push_back(new_of.at(mig->node_to_index(n)));
+
+      auto outputs = mockturtle::cleanup_dangling(subs[p], merged, leaves.begin(), leaves.end());
+      for (uint32_t i = 0; i < parts[p].exports.size(); ++i) {
+        new_of[mig->node_to_index(parts[p].exports[i])] = outputs[i];
+      }
+    }
+
+    mig->foreach_po([&](auto const& f) {
+      auto s = new_of.at(mig->node_to_index(mig->get_node(f)));
+      merged.create_po(mig->is_complemented(f) ? !s : s);
+    });
+
+    replace_network(std::move(merged));
+  }
+
+  void set_parallel_options(uint32_t gate_threshold, uint32_t threads, uint32_t partitions, bool is_deterministic) {
+    parallel_gate_threshold = gate_threshold;
+    num_threads = threads;
+    num_partitions = partitions;
+    deterministic = is_deterministic;
+  }
+
+  // ---------------------------------------------------------
+  // gain estimation (dry run, the network is not modified)
+  // ---------------------------------------------------------
+  struct timing_info {
+    std::vector<mockturtle::mig_network::node> order; // topological order of the live nodes
+    std::vector<uint32_t> level;                      // longest path from the PIs
+    std::vector<uint32_t> rev_level;                  // longest path to a PO
+    std::vector<uint32_t> fanouts;                    // live fanouts, PO references included
+    uint32_t depth = 0;
+
+    bool is_critical(uint32_t idx) const { return level[idx] + rev_level[idx] == depth; }
+  };
+
+  timing_info compute_timing() {
+    timing_info t;
+    t.level.assign(mig->size(), 0);
+    t.rev_level.assign(mig->size(), 0);
+    t.fanouts.assign(mig->size(), 0);
+
+    mockturtle::topo_view<mockturtle::mig_network> topo(*mig);
+    topo.foreach_node([&](auto n) { t.order.push_back(n); });
+
+    for (auto n : t.order) {
+      if (!mig->is_maj(n)) continue;
+      auto idx = mig->node_to_index(n);
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->node_to_index(mig->get_node(f));
+        t.level[idx] = std::max(t.level[idx], t.level[c] + 1);
+        ++t.fanouts[c];
+      });
+    }
+    mig->foreach_po([&](auto const& f) {
+      auto idx = mig->node_to_index(mig->get_node(f));
+      t.depth = std::max(t.depth, t.level[idx]);
+      ++t.fanouts[idx];
+    });
+    for (auto it = t.order.rbegin(); it != t.order.rend(); ++it) {
+      if (!mig->is_maj(*it)) continue;
+      auto idx = mig->node_to_index(*it);
+      mig->foreach_fanin(*it, [&](auto const& f) {
+        auto c = mig->node_to_index(mig->get_node(f));
+        t.rev_level[c] = std::max(t.rev_level[c], t.rev_level[idx] + 1);
+      });
+    }
+    return t;
+  }
+
+  // true if every critical path goes through at least one marked node
+  bool covers_critical_paths(timing_info const& t, std::vector<bool> const& marked) {
+    std::vector<bool> open(mig->size(), false); // reachable on a critical path avoiding marked nodes
+    for (auto n : t.order) {
+      auto idx = mig->node_to_index(n);
+      if (!t.is_critical(idx) || marked[idx]) continue;
+      if (!mig->is_maj(n)) {
+        open[idx] = true;
+        continue;
+      }
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->node_to_index(mig->get_node(f));
+        if (t.level[c] + 1 == t.level[idx] && open[c]) open[idx] = true;
+      });
+    }
+    bool covered = true;
+    mig->foreach_po([&](auto const& f) {
+      auto idx = mig->node_to_index(mig->get_node(f));
+      if (t.level[idx] == t.depth && open[idx]) covered = false;
+    });
+    return covered;
+  }
+
+  // critical nodes that associativity / distributivity can pull up by one level
+  std::pair<int, int> estimate_rewrite(timing_info const& t) {
+    std::vector<bool> candidate(mig->size(), false);
+    int area = 0;
+    uint32_t num_candidates = 0;
+
+    for (auto n : t.order) {
+      auto idx = mig->node_to_index(n);
+      if (!mig->is_maj(n) || !t.is_critical(idx)) continue;
+      uint32_t L = t.level[idx];
+
+      // exactly one critical child, and it is a gate
+      uint32_t num_critical = 0;
+      mockturtle::mig_network::signal crit_f;
+      mig->foreach_fanin(n, [&](auto const& f) {
+        if (t.level[mig->node_to_index(mig->get_node(f))] + 1 == L) {
+          ++num_critical;
+          crit_f = f;
+        }
+      });
+      if (num_critical != 1) continue;
+      auto c = mig->get_node(crit_f);
+      if (!mig->is_maj(c)) continue;
+
+      // the child has one critical fanin z, everything else needs a level of slack
+      uint32_t num_critical_grandchildren = 0;
+      bool slack_ok = true;
+      std::vector<mockturtle::mig_network::signal> child_fanins;
+      mig->foreach_fanin(c, [&](auto const& f) {
+        auto l = t.level[mig->node_to_index(mig->get_node(f))];
+        if (l + 2 == L) ++num_critical_grandchildren;
+        else if (l + 3 > L) slack_ok = false;
+        child_fanins.push_back(f);
+      });
+      bool shares_fanin = false;
+      mig->foreach_fanin(n, [&](auto const& f) {
+        if (mig->get_node(f) == c) return;
+        if (t.level[mig->node_to_index(mig->get_node(f))] + 3 > L) slack_ok = false;
+        if (std::find(child_fanins.begin(), child_fanins.end(), f) != child_fanins.end()) shares_fanin = true;
+      });
+      if (num_critical_grandchildren != 1 || !slack_ok) continue;
+
+      candidate[idx] = true;
+      ++num_candidates;
+      // associativity reuses the shared input, distributivity adds two gates
+      bool child_dies = t.fanouts[mig->node_to_index(c)] == 1;
+      area += shares_fanin ? (child_dies ? 0 : 1) : (child_dies ? 1 : 2);
+    }
+
+    if (num_candidates == 0) return {0, 0};
+    return {area, covers_critical_paths(t, candidate) ? -1 : 0};
+  }
+
+  // single-fanout critical chains that sop balancing can turn into trees
+  // (rw: estimate_rewrite(t) if the caller already has it)
+  std::pair<int, int> estimate_balance(timing_info const& t, std::pair<int, int> const* rw = nullptr) {
+    std::vector<uint32_t> chain(mig->size(), 0);
+    std::vector<uint32_t> path_gain(mig->size(), 0); // gain guaranteed on every critical path below the node
+
+    for (auto n : t.order) {
+      auto idx = mig->node_to_index(n);
+      if (!mig->is_maj(n) || !t.is_critical(idx)) continue;
+
+      chain[idx] = 1;
+      uint32_t min_child_gain = std::numeric_limits<uint32_t>::max();
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->get_node(f);
+        auto cidx = mig->node_to_index(c);
+        if (t.level[cidx] + 1 != t.level[idx]) return;
+        if (mig->is_maj(c) && t.fanouts[cidx] == 1) chain[idx] = std::max(chain[idx], chain[cidx] + 1);
+        min_child_gain = std::min(min_child_gain, mig->is_maj(c) ? path_gain[cidx] : 0u);
+      });
+      if (min_child_gain == std::numeric_limits<uint32_t>::max()) min_child_gain = 0;
+
+      // a chain of L gates has L + 1 leaves, a balanced tree needs ceil(log2(L + 1)) levels
+      uint32_t tree = 0;
+      while ((1u << tree) < chain[idx] + 1) ++tree;
+      path_gain[idx] = std::max(chain[idx] - tree, min_child_gain);
+    }
+
+    uint32_t gain = std::numeric_limits<uint32_t>::max();
+    mig->foreach_po([&](auto const& f) {
+      auto idx = mig->node_to_index(mig->get_node(f));
+      if (t.level[idx] == t.depth) gain = std::min(gain, mig->is_maj(mig->get_node(f)) ? path_gain[idx] : 0u);
+    });
+    if (gain == std::numeric_limits<uint32_t>::max()) gain = 0;
+
+    auto est = std::make_pair(0, -(int)gain);
+    // balance() finishes with depth rewriting on circuits below the huge threshold
+    if (mig->num_gates() <= 50000) {
+      auto rw_est = rw ? *rw : estimate_rewrite(t);
+      est.first += rw_est.first;
+      est.second = std::min(est.second, rw_est.second);
+    }
+    return est;
+  }
+
+  // 256 random patterns through the live nodes (fixed seed, so the estimate is deterministic)
+  using sim_sig_t = std::array<uint64_t, 4>;
+
+  std::vector<sim_sig_t> simulate(timing_info const& t) {
+    std::vector<sim_sig_t> sim(mig->size(), sim_sig_t{0, 0, 0, 0});
+    std::mt19937_64 rng(0x5EED);
+    mig->foreach_pi([&](auto n) {
+      for (auto& w : sim[mig->node_to_index(n)]) w = rng();
+    });
+
+    for (auto n : t.order) {
+      if (!mig->is_maj(n)) continue;
+      std::array<sim_sig_t, 3> in;
+      uint32_t i = 0;
+      mig->foreach_fanin(n, [&](auto const& f) {
+        in[i] = sim[mig->node_to_index(mig->get_node(f))];
+        if (mig->is_complemented(f)) for (auto& w : in[i]) w = ~w;
+        ++i;
+      });
+      auto& out = sim[mig->node_to_index(n)];
+      for (uint32_t w = 0; w < 4; ++w) {
+        out[w] = (in[0][w] & in[1][w]) | (in[0][w] & in[2][w]) | (in[1][w] & in[2][w]);
+      }
+    }
+    return sim;
+  }
+
+  // maximum fanout-free cone of a root under the reference counts in refs
+  struct mffc_info {
+    std::vector<mockturtle::mig_network::node> nodes;  // gates of the MFFC, root included
+    std::vector<mockturtle::mig_network::node> leaves; // distinct fanins outside the MFFC (no constant)
+    std::vector<uint32_t> derefs;                      // refs decremented while collecting
+    bool truncated = false;                            // larger than max_mffc_size, nodes / leaves incomplete
+  };
+
+  // bounds the work per root (nested MFFCs along a chain would otherwise be quadratic);
+  // resub / refactor windows do not reach such cones either
+  static constexpr uint32_t max_mffc_size = 64;
+
+  // marks the MFFC in stamp (value `id`) and leaves refs dereferenced, see restore_refs
+  mffc_info collect_mffc(mockturtle::mig_network::node root, std::vector<uint32_t>& refs,
+                         std::vector<bool> const& freed, std::vector<uint32_t>& stamp, uint32_t id) {
+    mffc_info m;
+    std::vector<mockturtle::mig_network::node> stack{root};
+    stamp[mig->node_to_index(root)] = id;
+    while (!stack.empty()) {
+      if (m.nodes.size() >= max_mffc_size) {
+        m.truncated = true;
+        break;
+      }
+      auto n = stack.back();
+      stack.pop_back();
+      m.nodes.push_back(n);
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->get_node(f);
+        auto cidx = mig->node_to_index(c);
+        if (mig->is_constant(c) || refs[cidx] == 0) return;
+        m.derefs.push_back(cidx);
+        if (--refs[cidx] == 0 && mig->is_maj(c) && !freed[cidx]) {
+          stamp[cidx] = id;
+          stack.push_back(c);
+        }
+      });
+    }
+
+    for (auto n : m.nodes) {
+      mig->foreach_fanin(n, [&](auto const& f) {
+        auto c = mig->get_node(f);
+        auto cidx = mig->node_to_index(c);
+        if (mig->is_constant(c) || stamp[cidx] == id) return;
+        if (std::find(m.leaves.begin(), m.leaves.end(), c) == m.leaves.end()) m.leaves.push_back(c);
+      });
+    }
+    return m;
+  }
+
+  static void restore_refs(mffc_info const& m, std::vector<uint32_t>& refs) {
+    for (auto idx : m.derefs) ++refs[idx];
+  }
+
+  // mig_resubstitution with max_inserts = 1, in topological order: a node is replaced by an existing
+  // divisor (0-resub, frees the whole MFFC) or by a new majority of three divisors (1-resub, frees
+  // the MFFC minus the new gate). Divisors are the MFFC leaves and their fanins, outside the MFFC;
+  // functions are compared on the random simulation signatures.
+  int estimate_resub(timing_info const& t, std::vector<sim_sig_t> const& sim) {
+    constexpr uint32_t max_triple_divisors = 8;
+
+    std::vector<uint32_t> refs(t.fanouts);
+    std::vector<bool> freed(mig->size(), false);
+    std::vector<uint32_t> stamp(mig->size(), 0);
+    std::vector<uint32_t> div_stamp(mig->size(), 0);
+    int gain = 0;
+
+    auto matches = [](sim_sig_t const& a, sim_sig_t const& target) {
+      bool same = true, inverted = true;
+      for (uint32_t w = 0; w < 4; ++w) {
+        same &= a[w] == target[w];
+        inverted &= a[w] == ~target[w];
+      }
+      return same || inverted;
+    };
+
+    for (auto n : t.order) {
+      auto idx = mig->node_to_index(n);
+      if (!mig->is_maj(n) || freed[idx]) continue;
+      uint32_t id = idx + 1;
+      auto m = collect_mffc(n, refs, freed, stamp, id);
+      if (m.truncated) {
+        restore_refs(m, refs);
+        continue;
+      }
+      auto const& target = sim[idx];
+
+      std::vector<uint32_t> divs;
+      auto add_divisor = [&](mockturtle::mig_network::node d) {
+        auto didx = mig->node_to_index(d);
+        if (mig->is_constant(d) || stamp[didx] == id || div_stamp[didx] == id || freed[didx]) return;
+        div_stamp[didx] = id;
+        divs.push_back(didx);
+      };
+      for (auto l : m.leaves) add_divisor(l);
+      for (auto l : m.leaves) {
+        if (mig->is_maj(l)) mig->foreach_fanin(l, [&](auto const& f) { add_divisor(mig->get_node(f)); });
+      }
+
+      // 0-resub: the constant or a single divisor
+      int g = 0;
+      if (matches(sim_sig_t{0, 0, 0, 0}, target)) g = (int)m.nodes.size();
+      for (uint32_t i = 0; g == 0 && i < divs.size(); ++i) {
+        if (matches(sim[divs[i]], target)) g = (int)m.nodes.size();
+      }
+
+      // 1-resub: MAJ of three divisors, at most one complemented input (MAJ is self-dual)
+      uint32_t nd = std::min<uint32_t>(divs.size(), max_triple_divisors);
+      if (g == 0 && m.nodes.size() >= 2) {
+        for (uint32_t a = 0; g == 0 && a < nd; ++a) {
+          for (uint32_t b = a + 1; g == 0 && b < nd; ++b) {
+            for (uint32_t c = b + 1; g == 0 && c < nd; ++c) {
+              for (uint32_t inv = 0; g == 0 && inv < 4; ++inv) {
+                sim_sig_t maj;
+                for (uint32_t w = 0; w < 4; ++w) {
+                  uint64_t x = sim[divs[a]][w], y = sim[divs[b]][w], z = sim[divs[c]][w];
+                  if (inv == 1) x = ~x;
+                  if (inv == 2) y = ~y;
+                  if (inv == 3) z = ~z;
+                  maj[w] = (x & y) | (x & z) | (y & z);
+                }
+                if (matches(maj, target)) g = (int)m.nodes.size() - 1;
+              }
+            }
+          }
+        }
+      }
+
+      if (g > 0) {
+        gain += g;
+        for (auto f : m.nodes) freed[mig->node_to_index(f)] = true;
+      } else {
+        restore_refs(m, refs);
+      }
+    }
+    return gain;
+  }
+
+  // refactoring with Akers resynthesis (refactoring_params defaults: at most 6 leaves, zero gain
+  // allowed): every MFFC is compared with the size of its resynthesized cone. The depth drops when
+  // the accepted cones arrive earlier at nodes that cover every critical path.
+  std::pair<int, int> estimate_refactor(timing_info const& t) {
+    constexpr uint32_t max_leaves = 6;
+    using signal = mockturtle::mig_network::signal;
+    mockturtle::akers_resynthesis<mockturtle::mig_network> resyn;
+
+    std::vector<uint32_t> pos(mig->size(), 0);
+    for (uint32_t i = 0; i < t.order.size(); ++i) pos[mig->node_to_index(t.order[i])] = i;
+
+    std::vector<uint32_t> refs(t.fanouts);
+    std::vector<bool> freed(mig->size(), false);
+    std::vector<uint32_t> stamp(mig->size(), 0);
+    std::vector<bool> faster(mig->size(), false);
+    int gain = 0;
+    uint32_t num_faster = 0;
+
+    for (auto n : t.order) {
+      auto idx = mig->node_to_index(n);
+      if (!mig->is_maj(n) || freed[idx]) continue;
+      auto m = collect_mffc(n, refs, freed, stamp, idx + 1);
+      if (m.truncated || m.nodes.size() < 2 || m.leaves.empty() || m.leaves.size() > max_leaves) {
+        restore_refs(m, refs);
+        continue;
+      }
+
+      // function of the root over the leaves
+      uint32_t k = m.leaves.size();
+      std::unordered_map<uint32_t, kitty::dynamic_truth_table> tt;
+      for (uint32_t i = 0; i < k; ++i) {
+        kitty::dynamic_truth_table var(k);
+        kitty::create_nth_var(var, i);
+        tt.emplace(mig->node_to_index(m.leaves[i]), var);
+      }
+      tt.emplace(mig->node_to_index(mig->get_node(mig->get_constant(false))), kitty::dynamic_truth_table(k));
+
+      auto cone_nodes = m.nodes;
+      std::sort(cone_nodes.begin(), cone_nodes.end(), [&](auto const& a, auto const& b) {
+        return pos[mig->node_to_index(a)] < pos[mig->node_to_index(b)];
+      });
+      for (auto c : cone_nodes) {
+        std::vector<kitty::dynamic_truth_table> in;
+        mig->foreach_fanin(c, [&](auto const& f) {
+          auto const& x = tt.at(mig->node_to_index(mig->get_node(f)));
+          in.push_back(mig->is_complemented(f) ? ~x : x);
+        });
+        tt.emplace(mig->node_to_index(c), (in[0] & in[1]) | (in[0] & in[2]) | (in[1] & in[2]));
+      }
+
+      // resynthesize into a scratch network, with the leaf arrival times of the current network
+      mockturtle::mig_network cone;
+      std::vector<signal> pis;
+      for (uint32_t i = 0; i < k; ++i) pis.push_back(cone.create_pi());
+      resyn(cone, tt.at(idx), pis.begin(), pis.end(), [&](auto const& f) {
+        cone.create_po(f);
+        return false;
+      });
+      if (cone.num_pos() == 0) {
+        restore_refs(m, refs);
+        continue;
+      }
+
+      int g = (int)m.nodes.size() - (int)cone.num_gates();
+      if (g < 0) {
+        restore_refs(m, refs);
+        continue;
+      }
+
+      std::vector<uint32_t> arrival(cone.size(), 0);
+      for (uint32_t i = 0; i < k; ++i) arrival[cone.node_to_index(cone.get_node(pis[i]))] = t.level[mig->node_to_index(m.leaves[i])];
+      cone.foreach_gate([&](auto g_node) {
+        auto gidx = cone.node_to_index(g_node);
+        cone.foreach_fanin(g_node, [&](auto const& f) {
+          arrival[gidx] = std::max(arrival[gidx], arrival[cone.node_to_index(cone.get_node(f))] + 1);
+        });
+      });
+      uint32_t new_level = 0;
+      cone.foreach_po([&](auto const& f) { new_level = arrival[cone.node_to_index(cone.get_node(f))]; });
+      if (t.is_critical(idx) && new_level < t.level[idx]) {
+        faster[idx] = true;
+        ++num_faster;
+      }
+
+      // refactoring replaces the cone (allow_zero_gain), so its nodes are not counted again
+      gain += g;
+      for (auto f : m.nodes) freed[mig->node_to_index(f)] = true;
+    }
+
+    int depth = (num_faster > 0 && covers_critical_paths(t, faster)) ? -1 : 0;
+    return {-gain, depth};
+  }
+
+  // predicted (area delta, depth delta) of an action, same ids as the env:
+  // 0: rewrite, 1: balance, 2: resub, 3: refactor
+  std::pair<int, int> estimate(int action_id) {
+    if (action_id < 0 || action_id > 3) {
+      throw std::invalid_argument("Unknown action id: " + std::to_string(action_id));
+    }
+    auto t = compute_timing();
+    if (t.depth == 0) return {0, 0};
+
+    switch (action_id) {
+    case 0: return estimate_rewrite(t);
+    case 1: return estimate_balance(t);
+    case 2: return {-estimate_resub(t, simulate(t)), 0};
+    default: return estimate_refactor(t);
+    }
+  }
+
+  // estimate() for every action, sharing one timing pass (and the rewrite result)
+  std::vector<std::pair<int, int>> estimate_all() {
+    auto t = compute_timing();
+    if (t.depth == 0) return std::vector<std::pair<int, int>>(4, {0, 0});
+
+    auto rw = estimate_rewrite(t);
+    auto bl = estimate_balance(t, &rw);
+    std::pair<int, int> rs{-estimate_resub(t, simulate(t)), 0};
+    return {rw, bl, rs, estimate_refactor(t)};
+  }
+
+  // dead-node compaction
+  uint32_t count_live_nodes() {
+    // constant + PIs + gates that are not dead
+    uint32_t live = 1 + mig->num_pis();
+    mig->foreach_gate([&](auto) { ++live; });
+    return live;
+  }
+
+  double live_ratio() {
+    return (double)count_live_nodes() / (double)std::max<uint32_t>(mig->size(), 1u);
+  }
+
+  // drop dead and dangling nodes, re-index the storage of the managed network
+  void compact() {
+    replace_network(mockturtle::cleanup_dangling(*mig));
+    ++num_compactions;
+  }
+
+  void maybe_compact() {
+    if (compaction_threshold <= 0.0) return;
+    if (live_ratio() < compaction_threshold) compact();
+  }
+
+  void set_compaction_threshold(double threshold) {
+    compaction_threshold = threshold;
+  }
+
+  py::dict get_memory_stats() {
+    using node_t = typename decltype(mig->_storage->nodes)::value_type;
+    using hash_entry_t = typename decltype(mig->_storage->hash)::value_type;
+
+    uint32_t allocated = mig->size();
+    uint32_t live = count_live_nodes();
+
+    py::dict stats;
+    stats["allocated_nodes"] = allocated;
+    stats["live_nodes"] = live;
+    stats["dead_nodes"] = allocated - live;
+    stats["live_ratio"] = (double)live / (double)std::max<uint32_t>(allocated, 1u);
+    stats["bytes_used"] = (size_t)mig->_storage->nodes.size() * sizeof(node_t) +
+                          (size_t)mig->_storage->hash.size() * sizeof(hash_entry_t);
+    stats["bytes_reserved"] = (size_t)mig->_storage->nodes.capacity() * sizeof(node_t);
+    stats["num_compactions"] = num_compactions;
+    stats["compaction_threshold"] = compaction_threshold;
+    return stats;
+  }
+
+  // ---------------------------------------------------------
+  // scripted action sequences ("rw; rs; bl; rf")
+  // ---------------------------------------------------------
+  // same ids as the env: 0: rewrite, 1: balance, 2: resub, 3: refactor
+  static int parse_action(std::string const& token) {
+    if (token == "rw" || token == "rewrite") return 0;
+    if (token == "b" || token == "bl" || token == "balance") return 1;
+    if (token == "rs" || token == "resub") return 2;
+    if (token == "rf" || token == "refactor") return 3;
+    throw std::invalid_argument("Unknown action in script: '" + token + "'");
+  }
+
+  static std::vector<int> parse_script(std::string const& script) {
+    std::vector<int> actions;
+    std::string token;
+    auto flush = [&]() {
+      if (!token.empty()) actions.push_back(parse_action(token));
+      token.clear();
+    };
+    for (char ch : script) {
+      if (ch == ';') flush();
+      else if (!std::isspace((unsigned char)ch)) token += (char)std::tolower((unsigned char)ch);
+    }
+    flush();
+    return actions;
+  }
+
+  void apply_action(int action_id) {
+    switch (action_id) {
+    case 0: rewrite(); break;
+    case 1: balance(); break;
+    case 2: resub(); break;
+    case 3: refactor(); break;
+    default: throw std::invalid_argument("Unknown action id: " + std::to_string(action_id));
+    }
+  }
+
+  // Runs the script `repeat` times without returning to Python. With patience > 0 it stops
+  // after that many consecutive steps that improve neither the best area nor the best depth.
+  // Returns one row (area, depth, seconds) per executed step.
+  py::array_t<double> run_script(std::string script, int repeat, int patience) {
+    auto actions = parse_script(script);
+    std::vector<std::array<double, 3>> rows;
+
+    {
+      py::gil_scoped_release release;
+
+      int best_area = get_node_count();
+      int best_depth = get_depth();
+      int no_gain = 0;
+      bool stop = false;
+
+      for (int r = 0; r < repeat && !stop; ++r) {
+        for (int a : actions) {
+          auto start = std::chrono::steady_clock::now();
+          apply_action(a);
+          std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+
+          int area = get_node_count();
+          int depth = get_depth();
+          rows.push_back({(double)area, (double)depth, elapsed.count()});
+
+          if (area < best_area || depth < best_depth) {
+            best_area = std::min(best_area, area);
+            best_depth = std::min(best_depth, depth);
+            no_gain = 0;
+          } else if (patience > 0 && ++no_gain >= patience) {
+            stop = true;
+            break;
+          }
+        }
+      }
+    }
+
+    py::array_t<double> out({(py::ssize_t)rows.size(), (py::ssize_t)3});
+    auto buf = out.mutable_unchecked<2>();
+    for (py::ssize_t i = 0; i < (py::ssize_t)rows.size(); ++i) {
+      for (py::ssize_t j = 0; j < 3; ++j) buf(i, j) = rows[i][j];
+    }
+    return out;
   }
 
   void save(std::string filename) {
@@ -165,8 +1093,7 @@ public:
 
   int get_node_count() { return mig->num_gates(); }
   int get_depth() {
-    mockturtle::depth_view<mockturtle::mig_network> d(*mig);
-    return d.depth();
+    return sync_depth();
   }
 
   // Weighted Switching Activity, WSA
@@ -205,7 +1132,6 @@ public:
     });
 
     // calc total WSA
-    mockturtle::fanout_view<mockturtle::mig_network> fanout_mig(*mig);
     double total_wsa = 0.0;
     
     mig->foreach_node([&](auto n) {
@@ -216,7 +1142,7 @@ public:
         // switching activity alpha = 2 * P * (1-P)
         double switching = 2.0 * p * (1.0 - p); 
         
-        int fanout_count = fanout_mig.fanout_size(n);
+        int fanout_count = fanout_mig->fanout_size(n);
         
         // WSA = switching activity * (intrinsic capacitance + load capacitance)
         total_wsa += switching * (1.0 + (double)fanout_count);
@@ -241,6 +1167,17 @@ PYBIND11_MODULE(mig_core, m) {
       .def("refactor", &MigManager::refactor, py::call_guard<py::gil_scoped_release>())
       .def("balance", &MigManager::balance, py::call_guard<py::gil_scoped_release>())
       .def("resub", &MigManager::resub, py::call_guard<py::gil_scoped_release>())
+
+      .def("compact", &MigManager::compact, py::call_guard<py::gil_scoped_release>())
+      .def("set_compaction_threshold", &MigManager::set_compaction_threshold)
+      .def("get_memory_stats", &MigManager::get_memory_stats)
+      .def("estimate", &MigManager::estimate, py::call_guard<py::gil_scoped_release>())
+      .def("estimate_all", &MigManager::estimate_all, py::call_guard<py::gil_scoped_release>())
+      // releases the GIL itself while the script runs
+      .def("run_script", &MigManager::run_script,
+           py::arg("script"), py::arg("repeat") = 1, py::arg("patience") = 0)
+      .def("set_parallel_options", &MigManager::set_parallel_options,
+           py::arg("gate_threshold"), py::arg("threads") = 0, py::arg("partitions") = 8, py::arg("deterministic") = true)
       
       .def("reset", &MigManager::reset) 
       .def("save", &MigManager::save);